@@ -1,8 +1,23 @@
 import pygame
 import sys
 import os
-import random
+import threading
+import queue
+from collections import OrderedDict
 import gamedata as g
+import engine
+import solver
+import card_atlas
+import dirty_rects
+import animation
+import transitions
+import assets
+import asset_cache
+import music
+import profiler
+import history
+import client
+import counting
 
 # --------------------------- Initialize Pygame Mixer and Pygame --------------------------- #
 pygame.mixer.pre_init(44100, 16, 2, 4096)
@@ -13,6 +28,23 @@ SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 SCREEN_SIZE = (SCREEN_WIDTH, SCREEN_HEIGHT)
 FPS = 60
+SHOE_DECKS = 6  # Decks in the dealing shoe
+SHOE_PENETRATION = 0.75  # Fraction of the shoe dealt before the cut card comes up
+SHOW_STRATEGY_HINT = True  # Show the exact best action for the player's hand
+PROFILE_FRAMES = os.environ.get('BLACKJACK_PROFILE') == '1'  # Opt-in frame profiler; F3 toggles its overlay
+RECORD_FILE = os.environ.get('BLACKJACK_RECORD')  # Hand history to append every finished round to
+REPLAY_FILE = os.environ.get('BLACKJACK_REPLAY')  # Hand history to play back instead of dealing new hands
+TABLE_SERVER = os.environ.get('BLACKJACK_SERVER')  # host:port of a table server (server.py) to play on
+TABLE_SEATS = os.environ.get('BLACKJACK_SEATS', '1')  # Player seats at the table, 1 to engine.MAX_SEATS (see Seats)
+COUNT_SYSTEM = os.environ.get('BLACKJACK_COUNT')  # Show the count with this system (counting.SYSTEMS)
+
+# Card animation timings, in seconds
+CARD_MOVE_TIME = 0.5   # Deck to hand
+DEAL_STAGGER = 0.25    # Between cards of the opening deal
+STAND_PAUSE = 0.5      # Before the dealer starts drawing
+DEALER_DRAW_GAP = 0.5  # Between the dealer's cards
+DECK_POS = (20, 50)
+TRANSITION_TIME = 0.4  # Crossfade between the menu and the table
 
 # Define colors
 TEXT_COLOR = pygame.Color('brown')
@@ -20,14 +52,80 @@ BACKGROUND_COLOR = pygame.Color('black')
 SIGN_BACKGROUND_COLOR = pygame.Color('dimgray')  # Background color for the welcome sign
 PAUSE_OUTLINE_COLOR = (255, 255, 255)  # Light brown color for outline
 PAUSE_TEXT_COLOR = (255, 255, 255)     # Light brown color for texts
+ACTIVE_SEAT_COLOR = pygame.Color('gold')  # Label of the seat whose turn it is
 
 # --------------------------- Paths --------------------------- #
 script_dir = os.path.dirname(os.path.abspath(__file__))
 images_folder_path = os.path.join(script_dir, 'images')
 music_folder = os.path.join(script_dir, 'music')
 
-# Supported music formats
-SUPPORTED_MUSIC_FORMATS = ['.ogg', '.mp3', '.wav']
+# --------------------------- Profiler --------------------------- #
+# Times the main loop and the draw functions when PROFILE_FRAMES is set.
+# The trace is written on exit and opens in chrome://tracing or ui.perfetto.dev.
+frame_profiler = profiler.FrameProfiler(PROFILE_FRAMES)
+profile_trace_path = os.path.join(script_dir, 'profile_trace.json')
+show_profile_overlay = PROFILE_FRAMES
+
+# --------------------------- Table Server --------------------------- #
+# With TABLE_SERVER set the rules, shoe and hand history live on the server and
+# this window only draws the table. The unseen cards are not known here, so no hint.
+remote_table = None
+if TABLE_SERVER:
+    try:
+        server_host, _, server_port = TABLE_SERVER.rpartition(':')
+        remote_table = client.TableClient(server_host or 'localhost', int(server_port))
+        SHOW_STRATEGY_HINT = False
+        print(f"Playing on the table server at {TABLE_SERVER}")
+    except (OSError, ValueError) as e:
+        print(f"Could not connect to the table server {TABLE_SERVER} ({e}). Playing locally.")
+
+# --------------------------- Seats --------------------------- #
+# Seats are laid out left to right along the bottom of the table (see seat_players).
+# The table server and hand history files deal a single seat.
+try:
+    seats = int(TABLE_SEATS)
+except ValueError:
+    print(f"BLACKJACK_SEATS should be a number of seats, not {TABLE_SEATS!r}; playing with one.")
+    seats = 1
+TABLE_SEATS = min(max(seats, 1), engine.MAX_SEATS)
+if TABLE_SEATS != seats:
+    print(f"A table has 1 to {engine.MAX_SEATS} seats; playing with {TABLE_SEATS}.")
+if TABLE_SEATS > 1 and (remote_table is not None or REPLAY_FILE):
+    print("Table servers and replays deal a single seat; playing with one.")
+    TABLE_SEATS = 1
+
+# --------------------------- Hand History --------------------------- #
+# With RECORD_FILE set, every finished round is appended to it; history.py replays the file.
+# With REPLAY_FILE set, the recorded hands are dealt and played again instead.
+hand_recorder = None
+replay_records = None
+replay_index = 0
+replay_record = None  # Record of the hand being replayed
+round_start = None    # (shoe seed, shoe position) of the round in play until it is recorded
+
+# On a table server, the hands are the server's to record (server.py --record)
+if REPLAY_FILE and remote_table is None:
+    try:
+        replay_decks, replay_records = history.read_history(REPLAY_FILE)
+        replayer = history.Replayer(replay_decks, compact=False)
+        print(f"Replaying {len(replay_records)} hands from {REPLAY_FILE}")
+    except (OSError, ValueError) as e:
+        print(f"Could not read the hand history {REPLAY_FILE}: {e}")
+elif RECORD_FILE and remote_table is None and TABLE_SEATS == 1:
+    try:
+        hand_recorder = history.HandRecorder(RECORD_FILE, SHOE_DECKS)
+    except (OSError, ValueError) as e:
+        print(f"Hands will not be recorded: {e}")
+
+# --------------------------- Card Counting --------------------------- #
+# The counter follows the local shoe (see main setup below); the table server's shoe is not visible.
+card_counter = None
+count_base = (0, 0)  # The counter's (running count, cards seen) before the round in play was dealt
+if COUNT_SYSTEM and remote_table is None:
+    try:
+        card_counter = counting.CardCounter(COUNT_SYSTEM, replay_decks if replay_records else SHOE_DECKS)
+    except ValueError as e:
+        print(f"Not showing the count: {e}")
 
 # --------------------------- Fonts --------------------------- #
 font = pygame.font.SysFont("sans-serif", 40)
@@ -47,15 +145,15 @@ previous_volume = 0.5  # Default previous volume
 
 is_paused = False  # Initialize is_paused to track music pause state
 
-# --------------------------- New Variables for Song Title Display --------------------------- #
-current_song_title = ""  # Stores the current song title
-
 # --------------------------- Button Classes --------------------------- #
 class Button:
     def __init__(self, x, y, image, scale=1):
         width = image.get_width()
         height = image.get_height()
-        self.image = pygame.transform.scale(image, (int(width * scale), int(height * scale)))
+        if scale == 1:
+            self.image = image  # Already drawn at this size, e.g. from the asset cache
+        else:
+            self.image = pygame.transform.scale(image, (int(width * scale), int(height * scale)))
         self.rect = self.image.get_rect()
         self.rect.center = (x, y)
         self.clicked = False
@@ -77,19 +175,36 @@ class Button:
         return action
 
 class SettingsButton(Button):
-    def __init__(self, x, y, image, scale=0.18, rotation_speed=1):
+    def __init__(self, x, y, image, scale=0.18, rotation_speed=1, angle_step=None):
         super().__init__(x, y, image, scale)
         self.rotation_speed = rotation_speed
         self.angle = 0
         self.original_scaled_image = self.image
 
+        # Rotate once per angle_step degrees up front; update() only picks a frame.
+        # By default the step is as far as the icon turns in two frames, in whole
+        # degrees that divide 360 (at least 1), so the icon moves at least every
+        # other frame. A coarser step than the speed makes the rotation stutter.
+        if angle_step is None:
+            turn = max(1, int(2 * abs(rotation_speed)))
+            angle_step = max(step for step in range(1, turn + 1) if 360 % step == 0)
+        elif angle_step <= 0 or 360 % angle_step:
+            raise ValueError(f"angle_step must divide 360 degrees, not {angle_step}")
+        self.angle_step = angle_step
+        center = self.rect.center
+        self.frames = []
+        for i in range(round(360 / angle_step)):
+            frame = pygame.transform.rotate(self.original_scaled_image, i * angle_step)
+            self.frames.append((frame, frame.get_rect(center=center)))
+
+    @frame_profiler.wrap('SettingsButton.update')
     def update(self):
         self.angle = (self.angle - self.rotation_speed) % 360
-        rotated_image = pygame.transform.rotate(self.original_scaled_image, self.angle)
-        self.image = rotated_image
-        old_center = self.rect.center
-        self.rect = self.image.get_rect()
-        self.rect.center = old_center
+        self.image, self.rect = self.frames[int(self.angle / self.angle_step) % len(self.frames)]
+
+    def frames_memory(self):
+        # Bytes of pixel data held by the precomputed frames
+        return sum(frame.get_bytesize() * frame.get_width() * frame.get_height() for frame, _ in self.frames)
 
     def draw(self, surface):
         self.update()
@@ -166,285 +281,137 @@ slider_y = popup_y + 200  # Adjust as needed for layout
 current_volume = 0.5  # Default volume
 volume_slider = Slider(slider_x, slider_y, slider_width, slider_height, 0.0, 1.0, current_volume)
 
-# --------------------------- Initialize Music --------------------------- #
-def load_music():
-    music_files = []
-    if not os.path.isdir(music_folder):
-        print(f"Music folder '{music_folder}' does not exist.")
-        return music_files
-
-    for file in os.listdir(music_folder):
-        if any(file.lower().endswith(ext) for ext in SUPPORTED_MUSIC_FORMATS):
-            full_path = os.path.join(music_folder, file)
-            music_files.append(full_path)
-
-    if not music_files:
-        print(f"No supported music files found in {music_folder}.")
-    else:
-        random.shuffle(music_files)
-    return music_files
-
-music_files = load_music()
-current_music_index = 0
-
-def play_music(index):
-    global current_song_title  # Declare as global to modify
-    if music_files:
-        try:
-            pygame.mixer.music.load(music_files[index])
-            pygame.mixer.music.set_volume(volume_slider.value if not is_muted else 0.0)
-            pygame.mixer.music.play()
-
-            # Extract song title from file name
-            song_path = music_files[index]
-            song_name = os.path.splitext(os.path.basename(song_path))[0]
-            current_song_title = song_name
-
-            print(f"Now playing: {song_name}")
-        except pygame.error as e:
-            print(f"Failed to load the music file '{music_files[index]}': {e}")
-
-if music_files:
-    play_music(current_music_index)
-
 # --------------------------- Initialize Pygame Display --------------------------- #
+# The window opens before any image is decoded so it appears straight away
 screen = pygame.display.set_mode(SCREEN_SIZE)
 pygame.display.set_caption("Blackjack Game")
 
-# -------------------------- Utility Functions -------------------------- #
-def fade(width, height):
-    fade_surface = pygame.Surface((width, height))
-    fade_surface.fill((0, 0, 0))
-    for alpha in range(0, 300, 5):
-        fade_surface.set_alpha(alpha)
-        
-        # Draw the game screen without the song title
-        screen.blit(saloon_background, (background_x, 0))
-        draw_welcome_sign()
-        start_button.draw(screen)
-        settings_button.draw(screen)
-        
-        # Blit the fade surface
-        screen.blit(fade_surface, (0, 0))
-        pygame.display.update()
-        pygame.time.delay(5)
-
-def redrawWindow():
-    screen.fill((255,255,255))
-    screen.blit(saloon_background, (background_x, 0))
-    settings_button.draw(screen)
-
-def draw_centered_text(text, font, text_col, surface, center_x, center_y):
-    img = font.render(text, True, text_col)
-    text_rect = img.get_rect(center=(center_x, center_y))
-    surface.blit(img, text_rect)
+# -------------------------- Music -------------------------- #
+# Tracks are read ahead on a worker thread and queued for gapless playback,
+# so changing tracks never waits on the disk (see music.py)
+MUSIC_END_EVENT = pygame.USEREVENT + 1
+music_player = music.MusicPlayer(music_folder, MUSIC_END_EVENT,
+                                 volume=lambda: volume_slider.value if not is_muted else 0.0)
+music_player.play(0)
 
+# -------------------------- Utility Functions -------------------------- #
 def place_welcome(x, y):
     screen.blit(welcome, (x, y))
 
-# -------------------------- Game State Functions -------------------------- #
-def draw_pause_menu():
-    popup_width, popup_height = 400, 200
-    popup_x = (SCREEN_WIDTH - popup_width) // 2
-    popup_y = (SCREEN_HEIGHT - popup_height) // 2
-
-    popup_rect = pygame.Rect(popup_x, popup_y, popup_width, popup_height)
-
-    popup_surface = pygame.Surface((popup_width, popup_height))
-    popup_surface.set_alpha(220)
-    popup_surface.fill((50, 50, 50))
-    screen.blit(popup_surface, (popup_x, popup_y))
-
-    pygame.draw.rect(screen, TEXT_COLOR, popup_rect, 5)
-
-    draw_centered_text("Paused", small_font, TEXT_COLOR, screen, SCREEN_WIDTH // 2, popup_y + 50)
-    draw_centered_text("Press ESC to Resume", small_font, TEXT_COLOR, screen, SCREEN_WIDTH // 2, popup_y + 130)
-
-    if current_song_title:
-        draw_centered_text(current_song_title, small_font, TEXT_COLOR, screen, SCREEN_WIDTH // 2, popup_y + 160)
-
-def run_game():
-    screen.blit(poker_table_background, (SCREEN_WIDTH // 2 - poker_table_background.get_width() // 2, SCREEN_HEIGHT //  1 - poker_table_background.get_height()))
-    draw_centered_text("Dealer must stand on 17 and must draw to 16", medium_font, TEXT_COLOR, screen, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-
-# -------------------------- Card Placement Function -------------------------- #
-def place_card(x, y):
-    screen.blit(card, (x, y))
-
-# -------------------------- Music Functions -------------------------- #
-def load_music():
-    music_files = []
-    if not os.path.isdir(music_folder):
-        print(f"Music folder '{music_folder}' does not exist.")
-        return music_files
-
-    for file in os.listdir(music_folder):
-        if any(file.lower().endswith(ext) for ext in SUPPORTED_MUSIC_FORMATS):
-            full_path = os.path.join(music_folder, file)
-            music_files.append(full_path)
+@frame_profiler.wrap('background_scroll')
+def scroll_background():
+    global background_x
+    background_x -= scroll_speed
+    if background_x <= -saloon_background.get_width():
+        background_x = 0  # Reset background_x when it scrolls off the screen
 
-    if not music_files:
-        print(f"No supported music files found in {music_folder}.")
-    else:
-        random.shuffle(music_files)
-    return music_files
+@frame_profiler.wrap()
+def draw_menu():
+    # Scrolling saloon background with the welcome sign; the buttons are drawn by the caller
+    screen.blit(saloon_background, (background_x, 0))
+    screen.blit(saloon_background, (background_x + saloon_background.get_width(), 0))  # For seamless scrolling
+    place_welcome(SCREEN_WIDTH // 2 - welcome.get_width() // 2, SCREEN_HEIGHT // 1.6 - welcome.get_height())
 
-def play_music(index):
-    global current_song_title
-    if music_files:
-        try:
-            pygame.mixer.music.load(music_files[index])
-            pygame.mixer.music.play()
-            current_song_title = os.path.splitext(os.path.basename(music_files[index]))[0]
-            print(f"Now playing: {current_song_title}")
-        except pygame.error as e:
-            print(f"Failed to load the music file '{music_files[index]}': {e}")
-
-def play_next_song():
-    global current_music_index
-    if music_files:
-        current_music_index += 1
-        if current_music_index >= len(music_files):
-            random.shuffle(music_files)
-            current_music_index = 0
-        play_music(current_music_index)
-
-def play_previous_song():
-    global current_music_index
-    if music_files:
-        current_music_index -= 1
-        if current_music_index < 0:
-            current_music_index = len(music_files) - 1
-        play_music(current_music_index)
 # -------------------------- Load Images -------------------------- #
-def load_image(filename):
+def load_image(filename, alpha=True):
     path = os.path.join(images_folder_path, filename)
     try:
-        image = pygame.image.load(path).convert_alpha()
-        return image
+        image = pygame.image.load(path)
+        # Backgrounds are opaque; without per-pixel alpha they blit faster
+        return image.convert_alpha() if alpha else image.convert()
     except FileNotFoundError:
         print(f"Image '{filename}' not found in {images_folder_path}.")
         pygame.quit()
         sys.exit()
 
-# Load backgrounds
-saloon_background = load_image('saloon_background.jpg')
-poker_table_background = load_image('table.jpg')
-
-# Load Game Logo
-game_logo = load_image('welcome.png')
-# Scale Game Logo if necessary
-game_logo = pygame.transform.scale(game_logo, (400, 200))  # Adjust size as needed
-
-# Scale backgrounds
-def scale_background(image):
-    scale_factor = SCREEN_HEIGHT / image.get_height()
-    width = int(image.get_width() * scale_factor)
-    return pygame.transform.scale(image, (width, SCREEN_HEIGHT))
-
-saloon_background = scale_background(saloon_background)
-poker_table_background = scale_background(poker_table_background)
-
-# Load button images
-start_img = load_image('start_button.png')
-settings_img = load_image('Setting.png')
-mute_img = load_image('mute.png')
-pause_img = load_image('Pause.png')  # Load Pause.png
-hit_img = load_image('hit_button.png')
-stand_img = load_image('stand_button.png')
-
-# Load Next and Previous button images
-next_img = load_image('next.png')
-previous_img = load_image('previous.png')
-
-# Create button instances
-start_button = Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50, start_img, scale=1.5)  # Adjusted y-position
-hit_button = Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100, hit_img, scale=1)
-stand_button = Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50, stand_img, scale=1)
-
-# Settings button setup
-SETTINGS_BUTTON_SCALE = 0.18
-PADDING = 20
-
-scaled_width = int(settings_img.get_width() * SETTINGS_BUTTON_SCALE)
-scaled_height = int(settings_img.get_height() * SETTINGS_BUTTON_SCALE)
-
-temp_scaled_image = pygame.transform.scale(settings_img, (scaled_width, scaled_height))
-rotated_temp_image = pygame.transform.rotate(temp_scaled_image, 0)
-rotated_width, rotated_height = rotated_temp_image.get_size()
-
-settings_button_x = SCREEN_WIDTH - rotated_width - PADDING
-settings_button_y = PADDING + rotated_height // 2
-
-settings_button = SettingsButton(
-    settings_button_x,
-    settings_button_y,
-    settings_img,
-    scale=SETTINGS_BUTTON_SCALE,
-    rotation_speed=0.3
-)
-
-#Create Back to Home button
-home_img = load_image('home.png')  # Adjust the filename as needed
-home_img_scaled = pygame.transform.scale(home_img, (int(home_img.get_width() * 0.5), int(home_img.get_height() * 0.5)))
-home_button = Button(0, 0, home_img_scaled, scale=.25)
-
-# Create mute button
-mute_img_scaled = pygame.transform.scale(mute_img, (int(mute_img.get_width() * 0.5), int(mute_img.get_height() * 0.5)))
-mute_button = Button(0, 0, mute_img_scaled, scale=.19)
-
-# Create pause music button
-pause_img_scaled = pygame.transform.scale(pause_img, (int(pause_img.get_width() * 0.5), int(pause_img.get_height() * 0.5)))
-pause_button = Button(0, 0, pause_img_scaled, scale=.25)
-
-# Create Next and Previous buttons
-next_img_scaled = pygame.transform.scale(next_img, (int(next_img.get_width() * 0.5), int(next_img.get_height() * 0.5)))
-previous_img_scaled = pygame.transform.scale(previous_img, (int(previous_img.get_width() * 0.5), int(previous_img.get_height() * 0.5)))
-
-next_button = Button(0, 0, next_img_scaled, scale=0.50)
-previous_button = Button(0, 0, previous_img_scaled, scale=0.54)
-
-# --------------------------- Initialize Cards --------------------------- #
-card_path = os.path.join(images_folder_path, '2C.png')  # Example card
+def load_prepared_image(name):
+    """
+    Returns an image from asset_cache.IMAGE_SPECS at the size it is drawn at.
+    It comes from the pre-scaled cache file when that is up to date, otherwise
+    the source image is decoded and scaled.
 
-try:
-    card = pygame.image.load(card_path).convert_alpha()
-    card_height = int(SCREEN_HEIGHT * 0.2)  # 20% of screen height
-    card_width = int(card.get_width() * (card_height / card.get_height()))
-    card = pygame.transform.scale(card, (card_width, card_height))
-except FileNotFoundError:
-    print(f"Card image not found in {card_path}.")
-    pygame.quit()
-    sys.exit()
-# -------------------------- Initialize Pygame and Music -------------------------- #
-pygame.init()
-pygame.mixer.pre_init(44100, 16, 2, 4096)
+    :param name: Spec name, e.g. 'table_background' or 'card_AH'.
+    """
+    image_cache = game_assets.get('image_cache')
+    if image_cache:
+        image = image_cache.surface(name)
+        if image is not None:
+            return image
+    filename, opaque, rule = asset_cache.IMAGE_SPECS[name]
+    return asset_cache.prepare_image(load_image(filename, alpha=not opaque), rule, SCREEN_SIZE)
 
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Blackjack Game")
+# Settings button setup
+PADDING = 25
 
-script_dir = os.path.dirname(os.path.abspath(__file__))
-images_folder_path = os.path.join(script_dir, 'images')
-music_folder = os.path.join(script_dir, 'music')
+def create_settings_button():
+    settings_img = game_assets.get('settings_image')
+    settings_button_x = SCREEN_WIDTH - settings_img.get_width() - PADDING
+    settings_button_y = PADDING + settings_img.get_height() // 2
+
+    return SettingsButton(
+        settings_button_x,
+        settings_button_y,
+        settings_img,
+        scale=1,
+        rotation_speed=0.3
+    )
+
+# --------------------------- Assets --------------------------- #
+# Every image is loaded once, through the asset manager. Only what the menu
+# shows is loaded before the first frame; the table, card faces and pause menu
+# icons are loaded the first time they are drawn.
+# Images are already scaled when they come from the cache built by asset_cache.py.
+game_assets = assets.AssetManager()
+game_assets.register('image_cache', lambda: asset_cache.open_cache(images_folder_path, SCREEN_SIZE))
+for image_name in asset_cache.IMAGE_SPECS:
+    if image_name.startswith(asset_cache.card_spec('')):
+        continue  # Card faces are loaded together, see preload_card_images
+    game_assets.register(image_name, lambda image_name=image_name: load_prepared_image(image_name))
+
+# Menu
+game_assets.register('start_button', lambda: Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.3, game_assets.get('start_image')))
+game_assets.register('settings_button', create_settings_button)
+
+# Table
+game_assets.register('card_faces', lambda: preload_card_images())
+game_assets.register('hit_button', lambda: Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.05, game_assets.get('hit_image')))
+game_assets.register('stand_button', lambda: Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.18, game_assets.get('stand_image')))
+game_assets.register('play_again_button', lambda: Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.3, game_assets.get('play_again_image')))
+
+# Pause menu; positions are set when the menu is drawn
+game_assets.register('home_button', lambda: Button(0, 0, game_assets.get('home_image')))
+game_assets.register('mute_button', lambda: Button(0, 0, game_assets.get('mute_image')))
+game_assets.register('pause_button', lambda: Button(0, 0, game_assets.get('pause_image')))
+game_assets.register('next_button', lambda: Button(0, 0, game_assets.get('next_image')))
+game_assets.register('previous_button', lambda: Button(0, 0, game_assets.get('previous_image')))
+
+MENU_ASSETS = ['saloon_background', 'welcome', 'start_button', 'settings_button']
+game_assets.preload(MENU_ASSETS)
+
+saloon_background = game_assets.get('saloon_background')
+welcome = game_assets.get('welcome')
+start_button = game_assets.get('start_button')
+settings_button = game_assets.get('settings_button')
+print(f"Settings button: {len(settings_button.frames)} rotation frames, {settings_button.frames_memory() / 1024:.0f} KB")
+print(game_assets.report())
+
+# --------------------------- Text Cache --------------------------- #
+TEXT_CACHE_SIZE = 128  # Rendered strings kept before the least recently used is dropped
+text_cache = OrderedDict()  # (text, font, color) -> rendered surface
+
+def render_text(text, font, color):
+    # font.render, but each distinct string is only rasterized once while it stays in use
+    key = (text, font, tuple(color))
+    image = text_cache.get(key)
+    if image is not None:
+        text_cache.move_to_end(key)
+        return image
 
-SUPPORTED_MUSIC_FORMATS = ['.ogg', '.mp3', '.wav']
-music_files = load_music()
-current_music_index = 0
-if music_files:
-    play_music(current_music_index)
-
-# --------------------------- Fade Function --------------------------- #
-def fade(width, height):
-    fade_surface = pygame.Surface((width, height))
-    fade_surface.fill((0, 0, 0))
-    for alpha in range(0, 300, 5):
-        fade_surface.set_alpha(alpha)
-        redraw_window()
-        screen.blit(fade_surface, (0, 0))
-        pygame.display.update()
-        pygame.time.delay(5)
+    image = font.render(text, True, color)
+    text_cache[key] = image
+    if len(text_cache) > TEXT_CACHE_SIZE:
+        text_cache.popitem(last=False)
+    return image
 
 # --------------------------- Rendering Functions --------------------------- #
 def render_text_with_shadow(text, font, text_color, shadow_color, surface, pos, shadow_offset=(2, 2)):
@@ -465,16 +432,17 @@ def render_text_with_shadow(text, font, text_color, shadow_color, surface, pos,
     surface.blit(shadow_text, shadow_rect)"""
 
     # Render the main text
-    main_text = font.render(text, True, text_color)
+    main_text = render_text(text, font, text_color)
     main_rect = main_text.get_rect(center=pos)
     surface.blit(main_text, main_rect)
 
 def draw_centered_text(text, font, text_col, surface, center_x, center_y):
-    img = font.render(text, True, text_col)
+    img = render_text(text, font, text_col)
     text_rect = img.get_rect(center=(center_x, center_y))
     surface.blit(img, text_rect)
 
 
+@frame_profiler.wrap()
 def draw_pause_menu():
     # Define the size and position of the pop-up window
     popup_width = 600
@@ -500,14 +468,14 @@ def draw_pause_menu():
     draw_centered_text(resume_text, pause_font, PAUSE_TEXT_COLOR, screen, SCREEN_WIDTH // 2, popup_y + 110)
 
     # -------------------- Add Song Title Display in Pause Menu -------------------- #
-    if current_song_title:
+    if music_player.title:
         # Define position for the song title within the popup
         song_title_y = popup_y + 160  # Adjust as needed
         song_title_x = popup_x + popup_width // 2  # Centered horizontally within the popup
 
         # Render the song title with drop shadow
         render_text_with_shadow(
-            text=current_song_title,
+            text=music_player.title,
             font=song_font,
             text_color=PAUSE_TEXT_COLOR,         # Use appropriate color
             shadow_color=(0, 0, 0),              # Black shadow
@@ -517,6 +485,12 @@ def draw_pause_menu():
         )
     # ---------------------------------------------------------------------------------- #
 
+    home_button = game_assets.get('home_button')
+    mute_button = game_assets.get('mute_button')
+    pause_button = game_assets.get('pause_button')
+    previous_button = game_assets.get('previous_button')
+    next_button = game_assets.get('next_button')
+
     home_button_x = popup_x + 50  # Positioned near the top-right of the popup
     home_button_y = popup_y + 50    # Adjust Y position as needed
     home_button.rect.center = (home_button_x, home_button_y)
@@ -550,13 +524,13 @@ def draw_pause_menu():
 
     # Draw the Next and Previous buttons and handle their actions
     if previous_button.draw(screen):
-        play_previous_song()
+        music_player.previous()
 
     if home_button.draw(screen):
         return_to_home()  # Use return_to_home instead of toggle_home
 
     if next_button.draw(screen):
-        play_next_song()
+        music_player.next()
 
     # Draw the volume slider
     volume_slider.draw(screen)
@@ -596,330 +570,460 @@ def draw_welcome_sign():
     # Blit the logo on top of the rounded rectangle
     screen.blit(game_logo, (bg_rect_x + padding, bg_rect_y + padding))
     '''
-def redraw_window():
-    if game_state == "menu":
-        screen.blit(saloon_background, (background_x, 0))
-        place_welcome(SCREEN_WIDTH // 2 - welcome.get_width() // 2, SCREEN_HEIGHT // 1.6 - welcome.get_height())
-        start_button.draw(screen)
-        settings_button.draw(screen)
-    elif game_state == "game":
-        run_game()
-        settings_button.draw(screen)
-        hit_button.draw(screen)
-        stand_button.draw(screen)
-    elif game_state == "pause":
-        if previous_state == "menu":
-            screen.blit(saloon_background, (background_x, 0))
-            draw_welcome_sign()
-            start_button.draw(screen)
-            settings_button.draw(screen)
-        elif previous_state == "game":
-            run_game()
-            settings_button.draw(screen)
-            hit_button.draw(screen)
-            stand_button.draw(screen)
-        draw_pause_menu()
-
 # --------------------------- Game Screen Logic --------------------------- #
+SEAT_Y = 350
+
+SEAT_GAP = 6  # Pixels kept clear between a hand and the next seat
+
+def seat_players(seats):
+    """
+    A Player for every seat, left to right along the bottom of the table, each
+    with card_pos_x/y at its first card. A single seat keeps the middle spot.
+    On a fuller table, card_spread is narrowed so a hand of engine.CARDS_PER_HAND
+    cards still fits its seat.
+    """
+    global card_spread
+    card_spread = MAX_CARD_SPREAD
+    if seats == 1:
+        return [g.Player(name='Player', card_pos_x=350, card_pos_y=SEAT_Y)]
+    slot = (SCREEN_WIDTH - 20) / seats
+    card_width = load_card_image('Blank').get_width()
+    fit = (slot - card_width - SEAT_GAP) // (engine.CARDS_PER_HAND - 1)
+    card_spread = int(max(1, min(MAX_CARD_SPREAD, fit)))
+    return [g.Player(name=f'Seat {i + 1}', card_pos_x=int(10 + i * slot), card_pos_y=SEAT_Y) for i in range(seats)]
+
+@frame_profiler.wrap()
 def run_game(startup, characters=None, deck=None):
-    global game_over, winner
+    global game_over, winner, game_round, round_start, count_base
     
     if not startup:
-        screen.blit(poker_table_background, (0, 0))
-        player1 = g.Player(name='Player', card_pos_x=350, card_pos_y=350)
+        # The table and card faces are only loaded once the first round starts
+        table_renderer.background = game_assets.get('table_background')
+        game_assets.get('card_faces')
+        table_renderer.invalidate()
+        players = seat_players(TABLE_SEATS)
         dealer = g.Player(name='Dealer', card_pos_x=350, card_pos_y=50)
 
-        characters = [player1, dealer]
-        deck = g.Deck()
-        deck.generate_deck()
-        deck.shuffle()
-        deal_start_cards(characters, deck)
-        startup = True
+        # The shoe persists across rounds and is only shuffled once the cut card is out.
+        # Every shuffle gets a fresh seed, so the hand history can deal the round again.
+        if remote_table is not None:
+            deck = None  # The server's shoe
+            game_round = client.RemoteRound(remote_table, players[0], dealer)
+        else:
+            if replay_records:
+                deck = next_replay_shoe()
+            else:
+                deck = shoe
+                if deck.needs_shuffle or deck.seed is None:
+                    deck.shuffle(history.new_seed())
+                    print("Shuffling the shoe...")
+            round_start = (deck.seed, deck.position)
+            if card_counter is not None:
+                count_base = (card_counter.running, card_counter.seen)
+            game_round = engine.Round(deck, dealer=dealer, players=players)
+        characters = game_round.characters
         game_over = False
         winner = None
+        try:
+            deal_start_cards(characters, deck)
+        except (ValueError, OSError) as e:
+            return leave_table_server(e)
+        startup = True
+
+    # Land any cards whose animation has finished before drawing
+    card_animations.update()
+
+    # Actions wait until the cards already on their way have landed; a replay waits while paused
+    if not game_over and not card_animations.busy():
+        try:
+            if replay_record is not None:
+                if game_state == "game":
+                    play_replay_action(characters, deck)
+            else:
+                if game_assets.get('stand_button').draw(table_renderer):
+                    stand(characters, deck)
 
-    if not game_over:
-        if stand_button.draw(screen):
-            stand(characters, deck)
-        
-        if hit_button.draw(screen):
-            hit(characters, deck)
+                if game_assets.get('hit_button').draw(table_renderer):
+                    hit(characters, deck)
+        except (ValueError, OSError) as e:
+            return leave_table_server(e)
 
     display_scores(characters)
     display_cards(characters)
     deck_pos = display_deck()
+    display_moving_cards()
+    display_hint()
+    display_count()
 
     if game_over:
         display_winner(winner)
-        if play_again_button.draw(screen):
+        if game_assets.get('play_again_button').draw(table_renderer):
             startup = False
             return startup, None, None, None
 
     return startup, characters, deck, deck_pos
 
-def stand(characters, deck):
+def leave_table_server(error):
+    # A table server that refuses an action or drops the connection sends the
+    # player back to the menu; the next round is dealt locally. Local errors are bugs.
+    global remote_table
+    if remote_table is None:
+        raise error
+    print(f"Lost the table server ({error}). Playing locally.")
+    remote_table.close()
+    remote_table = None
+    return_to_home()
+    return False, None, None, None
+
+# The rules live in engine.py; these functions queue the results as animations.
+# The round's outcome is only shown once the last card has landed.
+def sync_round_result():
     global game_over, winner
-    player, dealer = characters
-
-    # Reveal dealer's face-down card
-    display_cards(characters)
-    pygame.display.update()
-    pygame.time.wait(500)  # Pause for dramatic effect
+    game_over = game_round.game_over
+    winner = game_round.winner
+    request_hint()
+
+def record_finished_round():
+    # Called after every engine step; a round is recorded, or checked when replayed, once it ends
+    global round_start
+    if not game_round.game_over or round_start is None:
+        return
+    seed, position = round_start
+    round_start = None
+    if replay_record is not None:
+        if game_round.outcome != replay_record[3]:
+            print(f"Replayed hand ended {game_round.outcome:+d}, but was recorded as {replay_record[3]:+d}")
+    elif hand_recorder is not None:
+        hand_recorder.record_round(game_round, seed, position)
+        hand_recorder.flush()  # Written as it is played, so a crash or a killed game loses nothing
+
+def next_replay_shoe():
+    # The shoe as it was when the next recorded hand was dealt; the history repeats at its end
+    global replay_index, replay_record
+    replay_record = replay_records[replay_index % len(replay_records)]
+    print(f"Replaying hand {replay_index % len(replay_records)} of {len(replay_records)}")
+    replay_index += 1
+    seed, position, hits, outcome = replay_record
+    return replayer.setup(seed, position)
+
+def play_replay_action(characters, deck):
+    # Makes the recorded player's next move: their hits, then standing
+    if len(characters[0].hand) - 2 < replay_record[2]:
+        hit(characters, deck)
+    else:
+        stand(characters, deck)
 
-    deck_pos = display_deck()
-    # Dealer's turn
-    while dealer.bjcount < 17:
-        try:
-            card = deck.deal_card()
-        except IndexError:
-            print("Error: Deck is empty")
-            return
-
-        dealer.hand.append(card)
-        dealer.bjcount += get_card_value(card)
-        
-        if card[0] == 'A' and dealer.bjcount <= 21:
-            dealer.softhand = True
-        
-        animate_card_movement(card, dealer, deck_pos, characters, len(dealer.hand) - 1)
-        
-        if dealer.bjcount > 21:
-            if dealer.softhand:
-                dealer.bjcount -= 10
-                dealer.softhand = False
-            else:
-                game_over = True
-                winner = player
-                return
-
-    # Determine winner
-    game_over = True
-    if len(player.hand) == 2 and player.bjcount == 21:  # Player has Blackjack
-        winner = player
-    elif dealer.bjcount > player.bjcount:
-        winner = dealer
-    elif dealer.bjcount < player.bjcount:
-        winner = player
+def stand(characters, deck):
+    drawn = game_round.stand()
+    record_finished_round()
+    if game_round.game_over:
+        queue_dealer_draws(drawn, card_animations.busy_until())
     else:
-        winner = None  # It's a tie
+        sync_round_result()  # The next seat's turn
 
 def hit(characters, deck):
-    global game_over, winner
-    player = characters[0]
-
-    card = deck.deal_card()
-    player.hand.append(card)
-    if card[0] == 'A':
-        player.softhand = True
-    player.bjcount += get_card_value(card)
-
-    deck_pos = display_deck()
-    animate_card_movement(card, player, deck_pos, characters, len(player.hand) - 1)
-
-    if player.bjcount > 21:
-        if player.softhand:
-            player.bjcount -= 10
-            player.softhand = False
-        else:
-            game_over = True
-            winner = characters[1]  # Dealer wins
-
-    # Refresh the display after dealing
-    screen.blit(poker_table_background, (0, 0))
-    display_scores(characters)
-    display_cards(characters)
-    display_deck()
-    pygame.display.update()
-
-def get_card_value(card):
-    if card[0] in ['T', 'J', 'Q', 'K']:
-        return 10
-    elif card[0] == 'A':
-        return 11
-    else:
-        return int(card[0])
+    player = game_round.active
+    card = game_round.hit()
+    record_finished_round()
+
+    # A bust on the last seat hands over to the dealer, who plays for any seat still standing
+    drawn = game_round.dealer_drawn if game_round.game_over else []
+    move = queue_card_move(card, player, len(player.hand) - 1, card_animations.busy_until(),
+                           on_done=None if drawn else sync_round_result)
+    if drawn:
+        queue_dealer_draws(drawn, move.end_time)
+
+def queue_dealer_draws(drawn, after):
+    # The dealer's turn, from `after`; the round's result shows once the last card lands
+    dealer = game_round.dealer
+    first_index = len(dealer.hand) - len(drawn)
+
+    # Pause for dramatic effect before the dealer draws
+    start = after + STAND_PAUSE
+    if not drawn:
+        card_animations.add(animation.Delay(STAND_PAUSE, on_done=sync_round_result), after)
+    for i, card in enumerate(drawn):
+        last = i == len(drawn) - 1
+        queue_card_move(card, dealer, first_index + i, start + i * DEALER_DRAW_GAP,
+                        on_done=sync_round_result if last else None)
 
 def deal_start_cards(characters, deck):
-    deck_pos = display_deck()
-    player, dealer = characters
-    
-    # Deal first card to player
-    card = deck.deal_card()
-    player.hand.append(card)
-    if card[0] == 'A':
-        player.softhand = True
-    player.bjcount += get_card_value(card)
-    animate_card_movement(card, player, deck_pos, characters, len(player.hand) - 1)
-
-    # Deal first card to dealer (face down)
-    card = deck.deal_card()
-    dealer.hand.append(card)
-    if card[0] == 'A':
-        dealer.softhand = True
-    dealer.bjcount += get_card_value(card)
-    animate_card_movement('Blank', dealer, deck_pos, characters, len(dealer.hand) - 1)
-
-    # Deal second card to player
-    card = deck.deal_card()
-    player.hand.append(card)
-    if card[0] == 'A':
-        player.softhand = True
-    player.bjcount += get_card_value(card)
-    animate_card_movement(card, player, deck_pos, characters, len(player.hand) - 1)
-
-    # Deal second card to dealer (face up)
-    card = deck.deal_card()
-    dealer.hand.append(card)
-    if card[0] == 'A':
-        dealer.softhand = True
-    dealer.bjcount += get_card_value(card)
-    animate_card_movement(card, dealer, deck_pos, characters, len(dealer.hand) - 1)
-
-    for player in characters:
-        if player.bjcount == 21:
-            global game_over, winner
-            game_over = True
-            winner = player
-            return
-
-    # Refresh the display after dealing
-    screen.blit(poker_table_background, (0, 0))
-    display_scores(characters)
-    display_cards(characters)
-    display_deck()
-    pygame.display.update()
-
-def display_cards(characters, animate=False, animated_card=None):
-    player, dealer = characters
-    for i, card in enumerate(player.hand):
-        card_image = load_card_image(card)
-        x = player.card_pos_x + i * 30
-        y = player.card_pos_y
-        screen.blit(card_image, (x, y))
-
-    for i, card in enumerate(dealer.hand):
+    dealt = game_round.deal()
+    record_finished_round()
+    for character in characters:
+        shown_cards[character.name] = 0
+
+    # Cards are dealt in quick succession, several in the air at once
+    start = card_animations.busy_until()
+    dealt_to = {}
+    for i, (character, card) in enumerate(dealt):
+        card_index = dealt_to.get(character.name, 0)
+        dealt_to[character.name] = card_index + 1
+        # The dealer's first card is dealt face down
+        face = 'Blank' if character is game_round.dealer and card_index == 0 else card
+        last = i == len(dealt) - 1
+        queue_card_move(face, character, card_index, start + i * DEAL_STAGGER,
+                        on_done=sync_round_result if last else None)
+
+def queue_card_move(card, character, card_index, start_time, on_done=None):
+    # Slides a card from the deck to its spot in the hand; it counts as shown once it lands
+    def land():
+        shown_cards[character.name] = max(shown_cards.get(character.name, 0), card_index + 1)
+        if on_done:
+            on_done()
+
+    end_pos = (character.card_pos_x + card_index * card_spread, character.card_pos_y)
+    move = animation.CardMove(load_card_image(card), DECK_POS, end_pos, CARD_MOVE_TIME, on_done=land)
+    return card_animations.add(move, start_time)
+
+def display_moving_cards():
+    for card_image, pos in card_animations.moving():
+        table_renderer.blit(card_image, pos)
+
+# Number of cards per hand that have finished animating onto the table
+shown_cards = {}
+
+def visible_hand(character):
+    return character.hand[:shown_cards.get(character.name, len(character.hand))]
+
+@frame_profiler.wrap()
+def display_cards(characters):
+    *players, dealer = characters
+    for player in players:
+        for i, card in enumerate(visible_hand(player)):
+            card_image = load_card_image(card)
+            x = player.card_pos_x + i * card_spread
+            y = player.card_pos_y
+            table_renderer.blit(card_image, (x, y))
+
+    for i, card in enumerate(visible_hand(dealer)):
         if i == 0 and not game_over:
             card_image = load_card_image('Blank')
         else:
             card_image = load_card_image(card)
-        x = dealer.card_pos_x + i * 30
+        x = dealer.card_pos_x + i * card_spread
         y = dealer.card_pos_y
-        screen.blit(card_image, (x, y))
+        table_renderer.blit(card_image, (x, y))
 
-    if animate and animated_card:
-        screen.blit(animated_card[0], animated_card[1])
+# -------------------------- Card Image Cache -------------------------- #
+CARD_HEIGHT = int(SCREEN_HEIGHT * asset_cache.CARD_HEIGHT_FRACTION)  # Cards are drawn at 20% of screen height
+CARD_FACES = card_atlas.CARD_FACES
+# Up to three seats fit at full size; fuller tables get smaller cards, fanned tighter (seat_players)
+TABLE_CARD_HEIGHT = CARD_HEIGHT if TABLE_SEATS <= 3 else int(CARD_HEIGHT * 0.7)
+MAX_CARD_SPREAD = 30  # Pixels between the cards of a hand, where the seat is wide enough
+card_spread = MAX_CARD_SPREAD
+
+card_image_cache = {}  # (card, height) -> scaled, display-format surface
+card_cache_hits = 0
+card_cache_misses = 0
+
+def load_card_image(card, card_height=TABLE_CARD_HEIGHT):
+    """
+    Returns the surface for a card face, loading it from disk only the first time.
 
-def load_card_image(card):
+    :param card: Card code such as 'AH', a compact card, or 'Blank' for the card back.
+    :param card_height: Height in pixels the card is scaled to.
+    """
+    global card_cache_hits, card_cache_misses
+    card = g.card_name(card)
+    key = (card, card_height)
+    cardimg = card_image_cache.get(key)
+    if cardimg is not None:
+        card_cache_hits += 1
+        return cardimg
+
+    card_cache_misses += 1
     card_path = os.path.join(images_folder_path, card + '.png')
     try:
         cardimg = pygame.image.load(card_path)
-        card_height = int(SCREEN_HEIGHT * 0.2)
         card_width = int(cardimg.get_width() * (card_height / cardimg.get_height()))
-        return pygame.transform.scale(cardimg, (card_width, card_height))
+        cardimg = pygame.transform.scale(cardimg, (card_width, card_height)).convert_alpha()
     except FileNotFoundError as e:
         print(f"Image not found: {e}")
         pygame.quit()
         sys.exit()
 
+    card_image_cache[key] = cardimg
+    return cardimg
+
+def preload_card_images(card_height=TABLE_CARD_HEIGHT):
+    # Load every face once up front so no frame ever waits on disk I/O.
+    # The pre-scaled asset cache (see asset_cache.py) needs no decoding at all,
+    # a packed atlas (see card_atlas.py) only one decode for the whole deck.
+    if card_height != CARD_HEIGHT:
+        # The smaller cards of a fuller table are scaled down from the full-size faces
+        preload_card_images(CARD_HEIGHT)
+        for face in CARD_FACES:
+            full = card_image_cache[(face, CARD_HEIGHT)]
+            card_width = int(full.get_width() * (card_height / full.get_height()))
+            card_image_cache[(face, card_height)] = pygame.transform.smoothscale(full, (card_width, card_height))
+        return card_image_cache
+
+    image_cache = game_assets.get('image_cache')
+    if image_cache and card_height == CARD_HEIGHT:
+        for face in CARD_FACES:
+            card_image_cache[(face, card_height)] = image_cache.surface(asset_cache.card_spec(face))
+        return card_image_cache
+
+    atlas = card_atlas.load_atlas(images_folder_path, card_height)
+    if atlas:
+        for face, cardimg in atlas.items():
+            card_image_cache[(face, card_height)] = cardimg
+        return card_image_cache
+
+    for face in CARD_FACES:
+        load_card_image(face, card_height)
+    return card_image_cache
+
+def card_cache_stats():
+    return {'hits': card_cache_hits, 'misses': card_cache_misses, 'cached': len(card_image_cache)}
+
 def display_deck():
     deck_image = load_card_image('Blank')
-    deck_x = 20
-    deck_y = 50
-    screen.blit(deck_image, (deck_x, deck_y))
-    return (deck_x, deck_y)
+    table_renderer.blit(deck_image, DECK_POS)
+    return DECK_POS
     
-def display_scores(characters):
-    player, dealer = characters
-    player_score = large_font.render(f"Player: {player.bjcount}", True, GAME_TEXT_COLOR)
-    if game_over:
-        dealer_score = large_font.render(f"Dealer: {dealer.bjcount}", True, GAME_TEXT_COLOR)
-        
+# Last score label per hand: (cards shown, bjcount, game_over) -> rendered text.
+# The label is only rebuilt when one of those changes.
+score_labels = {}
+
+def score_label(character, dealer_hidden):
+    key = (shown_cards.get(character.name, len(character.hand)), character.bjcount, dealer_hidden)
+    cached = score_labels.get(character.name)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    if dealer_hidden:
+        # Only the face-up cards count while the dealer's first card is hidden
+        score = sum(engine.get_card_value(card) for card in visible_hand(character)[1:])
     else:
-        visible_dealer_score = sum(get_card_value(card) for card in dealer.hand[1:])
-        dealer_score = large_font.render(f"Dealer: {visible_dealer_score}", True, GAME_TEXT_COLOR)
-        
-    screen.blit(player_score, (10, SCREEN_HEIGHT - 40))
-    screen.blit(dealer_score, (10, 10))
+        score = engine.hand_total(visible_hand(character))
+    label = render_text(f"{character.name}: {score}", large_font, GAME_TEXT_COLOR)
+    score_labels[character.name] = (key, label)
+    return label
+
+def seat_score_label(player, result, active):
+    # The score line of a seat at a fuller table, cached in score_labels like score_label
+    key = (shown_cards.get(player.name, len(player.hand)), player.bjcount, result, active)
+    cached = score_labels.get(player.name)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    text = f"{engine.hand_total(visible_hand(player))}"
+    if result is not None:
+        text += f" {SEAT_RESULTS[result]}"
+    label = render_text(text, small_font, ACTIVE_SEAT_COLOR if active else GAME_TEXT_COLOR)
+    score_labels[player.name] = (key, label)
+    return label
+
+@frame_profiler.wrap()
+def display_scores(characters):
+    *players, dealer = characters
+    dealer_score = score_label(dealer, not game_over)
+    table_renderer.blit(dealer_score, (10, 10))
+
+    if len(players) == 1:
+        player_score = score_label(players[0], False)
+        table_renderer.blit(player_score, (10, SCREEN_HEIGHT - 40))
+        return
+
+    # The seat's name over its score, in gold for the seat whose turn it is;
+    # two short lines so seven seats fit across the table
+    for i, player in enumerate(players):
+        result = game_round.results[i] if game_over else None
+        active = i == game_round.turn and not card_animations.busy()
+        color = ACTIVE_SEAT_COLOR if active else GAME_TEXT_COLOR
+        table_renderer.blit(render_text(player.name, small_font, color), (player.card_pos_x, player.card_pos_y - 45))
+        table_renderer.blit(seat_score_label(player, result, active), (player.card_pos_x, player.card_pos_y - 25))
     
+# -------------------------- Strategy Hint -------------------------- #
+# The first solve of a hand can take up to a second without numpy, so it runs on
+# a worker thread. Later states of the same hand are already in the solver's table.
+hint_solver = solver.Solver()
+hint_requests = queue.Queue()
+hint_worker = None
+current_hint = {'key': None, 'action': None}
+
+def solve_hints():
+    # One worker solves requests in order, skipping any the game has moved past
+    while True:
+        key = hint_requests.get()
+        if current_hint['key'] != key:
+            continue
+        action = hint_solver.best_action(*key)
+        if current_hint['key'] == key:
+            current_hint['action'] = action
+
+def request_hint():
+    global hint_worker
+    if not SHOW_STRATEGY_HINT or game_round is None or game_round.game_over:
+        current_hint['key'] = None
+        current_hint['action'] = None
+        return
+
+    player, dealer = game_round.active, game_round.dealer
+    if player is None:  # Every seat has played; the dealer's turn
+        current_hint['key'] = None
+        current_hint['action'] = None
+        return
+    counts = solver.unseen_composition(game_round.deck, dealer)
+    key = (player.hard, player.aces > 0, dealer.hand[1], counts)
+    if current_hint['key'] == key:
+        return
+    current_hint['key'] = key
+    current_hint['action'] = None
+
+    if hint_worker is None:
+        hint_worker = threading.Thread(target=solve_hints, daemon=True)
+        hint_worker.start()
+    hint_requests.put(key)
+
+def display_hint():
+    if game_over or current_hint['action'] is None:
+        return
+    action, ev = current_hint['action']
+    draw_centered_text(f"Best: {action.upper()} ({ev:+.2f})", small_font, GAME_TEXT_COLOR, table_renderer,
+                       SCREEN_WIDTH - 120, SCREEN_HEIGHT - 25)
+
+def display_count():
+    # Counts the cards on the table as they land, so in-flight cards and the hole card are not given away
+    if card_counter is None or game_round is None:
+        return
+    running, seen = count_base
+    tags = card_counter.tags
+    for character in game_round.characters:
+        cards = visible_hand(character)
+        if character is game_round.dealer and not game_over:
+            cards = cards[1:]
+        running += sum(tags[card] for card in cards)
+        seen += len(cards)
+    if card_counter.balanced:
+        text = f"{card_counter.name}  RC {running:+d}  TC {card_counter.index_of(running, seen):+.1f}"
+    else:  # An unbalanced count is read as it runs, against its key count
+        text = f"{card_counter.name}  RC {running:+d}  Key {card_counter.key_count:+d}"
+    text = render_text(text, small_font, GAME_TEXT_COLOR)
+    table_renderer.blit(text, text.get_rect(topright=(SCREEN_WIDTH - 10, 10)))
+
+SEAT_RESULTS = {1: "Win", 0: "Push", -1: "Lose"}
+
 def display_winner(winner):
-    if winner is None:
+    if len(game_round.players) > 1:
+        results = game_round.results
+        message = f"{results.count(1)} won, {results.count(0)} pushed, {results.count(-1)} lost"
+    elif winner is None:
         message = "It's a tie!"
     elif winner.name == "Player":
         message = "You win!"
     else:
         message = "Dealer wins!"
     
-    winner_text = medium_font.render(message, True, GAME_TEXT_COLOR)
+    winner_text = render_text(message, medium_font, GAME_TEXT_COLOR)
     text_rect = winner_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-    screen.blit(winner_text, text_rect)
-
-
-    
-# -------------------------- Card Animation Functions -------------------------- #
-def animate_card(start_pos, end_pos, card_image, characters, deck_pos, duration=500):
-    start_time = pygame.time.get_ticks()
-    while True:
-        current_time = pygame.time.get_ticks()
-        if current_time - start_time > duration:
-            return
-
-        progress = (current_time - start_time) / duration
-        current_pos = (
-            start_pos[0] + (end_pos[0] - start_pos[0]) * progress,
-            start_pos[1] + (end_pos[1] - start_pos[1]) * progress
-        )
+    table_renderer.blit(winner_text, text_rect)
 
-        screen.blit(poker_table_background, (0, 0))
-        display_scores(characters)
-        display_cards(characters, animate=True, animated_card=(card_image, current_pos))
-        display_deck()
-        pygame.display.update()
-        clock.tick(60)
 
-def animate_card_movement(card, player, start_pos, characters, card_index, duration=500):
-    card_image = load_card_image(card)
-    end_pos = (player.card_pos_x + card_index * 30, player.card_pos_y)
-    start_time = pygame.time.get_ticks()
     
-    while True:
-        current_time = pygame.time.get_ticks()
-        if current_time - start_time > duration:
-            break
-
-        progress = (current_time - start_time) / duration
-        current_pos = (
-            start_pos[0] + (end_pos[0] - start_pos[0]) * progress,
-            start_pos[1] + (end_pos[1] - start_pos[1]) * progress
-        )
-
-        screen.blit(poker_table_background, (0, 0))
-        display_scores(characters)
-        display_cards(characters)
-        screen.blit(card_image, current_pos)
-        display_deck()
-        pygame.display.update()
-        clock.tick(60)
-
 # ----------------------------- Music Functions ----------------------------- #
-def play_next_song():
-    global current_music_index, music_files
-    if not music_files:
-        return
-    current_music_index += 1
-    if current_music_index >= len(music_files):
-        random.shuffle(music_files)
-        current_music_index = 0
-    play_music(current_music_index)
-
-def play_previous_song():
-    global current_music_index, music_files
-    if not music_files:
-        return
-    current_music_index -= 1
-    if current_music_index < 0:
-        current_music_index = len(music_files) - 1
-    play_music(current_music_index)
-
 def toggle_mute():
     global is_muted, previous_volume
     if not is_muted:
@@ -937,13 +1041,15 @@ def toggle_mute():
         volume_slider.value = restored_volume
 
 def return_to_home():
-    global game_state, startup, characters, deck, game_over, winner
+    global game_state, startup, characters, deck, game_over, winner, screen_transition
     # Reset all necessary game variables
     startup = False
     characters = None
     deck = None
     game_over = False
     winner = None
+    card_animations.clear()
+    screen_transition = transitions.Crossfade(screen.copy(), TRANSITION_TIME)
     game_state = "menu"
     print("Returning to home screen...")
 
@@ -958,106 +1064,11 @@ def toggle_pause_music():
         is_paused = False
         print("Music resumed.")
 
-# --------------------------- Initialize Music End Event --------------------------- #
-MUSIC_END_EVENT = pygame.USEREVENT + 1
-pygame.mixer.music.set_endevent(MUSIC_END_EVENT)
-
-# ------------------------- Initialize Variables ------------------------- #
-# Variables for scrolling background
-background_x = 0
-scroll_speed = 0.35
-direction = 1
-
-# Clock for frame rate
-clock = pygame.time.Clock()
-
-# Game state variables
-game_state = "menu"
-previous_state = None
-# -------------------------- Load Assets -------------------------- #
-saloon_background_path = os.path.join(images_folder_path, 'saloon_background.jpg')
-poker_table_background_path = os.path.join(images_folder_path, 'table.jpg')
-card_path = os.path.join(images_folder_path, '2C.png')
-welcome_path = os.path.join(images_folder_path, 'welcome.png')
-
-try:
-    saloon_background = pygame.image.load(saloon_background_path)
-    poker_table_background = pygame.image.load(poker_table_background_path)
-    card = pygame.image.load(card_path)
-    welcome = pygame.image.load(welcome_path)
-
-    # Scale backgrounds
-    scale_factor = SCREEN_HEIGHT / saloon_background.get_height()
-    saloon_background_width = int(saloon_background.get_width() * scale_factor)
-    saloon_background = pygame.transform.scale(saloon_background, (saloon_background_width, SCREEN_HEIGHT))
-
-    scale_factor = SCREEN_HEIGHT / poker_table_background.get_height()
-    poker_table_background_width = int(poker_table_background.get_width() * scale_factor)
-    poker_table_background = pygame.transform.scale(poker_table_background, (poker_table_background_width * 1, SCREEN_HEIGHT * 1))
-
-    card_height = int(SCREEN_HEIGHT * 0.2)
-    card_width = int(card.get_width() * (card_height / card.get_height()))
-    card = pygame.transform.scale(card, (card_width, card_height))
-
-    welcome_height = int(SCREEN_HEIGHT * 0.5)
-    welcome_width = int(welcome.get_width() * (welcome_height / welcome.get_height()))
-    welcome = pygame.transform.scale(welcome, (welcome_width, welcome_height))
-
-except FileNotFoundError as e:
-    print(f"Image not found: {e}")
-    pygame.quit()
-    sys.exit()
-
-button_images = {
-    'start': 'start_button.png',
-    'hit': 'hit_button.png',
-    'stand': 'stand_button.png',
-    'settings': 'Setting.png'
-}
-
-for key, filename in button_images.items():
-    path = os.path.join(images_folder_path, filename)
-    try:
-        button_images[key] = pygame.image.load(path).convert_alpha()
-    except FileNotFoundError:
-        print(f"{key.capitalize()} button image not found in {path}.")
-        pygame.quit()
-        sys.exit()
-
-# -------------------------- Create Game Objects -------------------------- #
-start_button = Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.3, button_images['start'], scale=1.5)
-hit_button = Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.05, button_images['hit'], scale=1)
-stand_button = Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.18, button_images['stand'], scale=1)
-play_again_button = Button(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 1.3, button_images['start'], scale=1)
-
-SETTINGS_BUTTON_SCALE = 0.18
-PADDING = 25
-
-scaled_width = int(button_images['settings'].get_width() * SETTINGS_BUTTON_SCALE)
-scaled_height = int(button_images['settings'].get_height() * SETTINGS_BUTTON_SCALE)
-
-temp_scaled_image = pygame.transform.scale(button_images['settings'], (scaled_width, scaled_height))
-rotated_temp_image = pygame.transform.rotate(temp_scaled_image, 0)
-rotated_width, rotated_height = rotated_temp_image.get_size()
-
-settings_button_x = SCREEN_WIDTH - rotated_width - PADDING
-settings_button_y = PADDING + rotated_height // 2
-
-settings_button = SettingsButton(
-    settings_button_x,
-    settings_button_y,
-    button_images['settings'],
-    scale=SETTINGS_BUTTON_SCALE,
-    rotation_speed=0.3
-)
-
-# -------------------------- Game Variables -------------------------- #
 background_x = 0
 scroll_speed = 0.35
 direction = 1
 
 GAME_TEXT_COLOR = pygame.Color('white')
-TEXT_COLOR = pygame.Color('black')
 large_font = pygame.font.SysFont("sans-serif", 60)
 medium_font = pygame.font.SysFont("sans-serif", 45)
 small_font = pygame.font.SysFont("sans-serif", 30)
@@ -1072,70 +1083,122 @@ winner = None
 startup = False
 characters = None
 deck = None
+game_round = None
+shoe = g.Shoe(SHOE_DECKS, SHOE_PENETRATION, reserve=engine.round_reserve(TABLE_SEATS))
+if card_counter is not None:
+    card_counter.follow(replayer.shoe if replay_records else shoe)
+
+# Card moves run from the main loop, so events keep being handled while they play
+card_animations = animation.AnimationScheduler()
+
+# Only the parts of the table that change each frame are redrawn and pushed to the display
+# The table background is set when the first round starts
+table_renderer = dirty_rects.DirtyRectRenderer(screen, None)
+drawn_state = None  # State drawn last frame; a change forces a full repaint
+screen_transition = None  # Crossfade in progress, drawn over the new scene
 
 # -------------------------- Main Game Loop -------------------------- #
-run = True
-while run:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            run = False
-
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                if game_state == "pause":
-                    game_state = previous_state
-                    print("Resuming game...")
-                elif game_state in ["menu", "game"]:
-                    previous_state = game_state
-                    game_state = "pause"
-                    print("Game paused.")
-
-        if game_state == "pause":
-            volume_slider.handle_event(event)
-
-    # Update background position for scrolling
-    background_x -= scroll_speed
-    if background_x <= -saloon_background.get_width():
-        background_x = 0  # Reset background_x when it scrolls off the screen
+if __name__ == "__main__":
+    run = True
+    while run:
+        frame_profiler.begin_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+
+            if event.type == MUSIC_END_EVENT:
+                music_player.handle_end_event()
+
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    if game_state == "pause":
+                        game_state = previous_state
+                        print("Resuming game...")
+                    elif game_state in ["menu", "game"]:
+                        previous_state = game_state
+                        game_state = "pause"
+                        print("Game paused.")
+                elif event.key == pygame.K_F3 and frame_profiler.enabled:
+                    show_profile_overlay = not show_profile_overlay
+                    table_renderer.invalidate()
+
+            if game_state == "pause":
+                volume_slider.handle_event(event)
+
+        # Start or queue any track the music worker has finished reading
+        music_player.update()
+
+        # Update background position for scrolling
+        scroll_background()
+
+        if game_state != drawn_state:
+            table_renderer.invalidate()
+            drawn_state = game_state
+
+        # Redraw window with updated background position
+        if game_state == "menu":
+            draw_menu()
+
+            # Check if the start button is clicked
+            if start_button.draw(screen):
+                screen_transition = transitions.Crossfade(screen.copy(), TRANSITION_TIME)
+                game_state = "game"
+
+            # Check if the settings button is clicked
+            if settings_button.draw(screen):
+                print("Settings button clicked from menu!")
+                previous_state = game_state
+                game_state = "pause"  # Change to pause menu or settings screen
+
+        elif game_state == "game":
+            table_renderer.begin_frame()
+            startup, characters, deck, deck_pos = run_game(startup, characters, deck)
+
+            if settings_button.draw(table_renderer):
+                previous_state = game_state
+                game_state = "pause"
+            with frame_profiler.section('present'):
+                table_renderer.end_frame(update=screen_transition is None)
+
+        elif game_state == "pause":
+            if previous_state == "menu":
+                draw_menu()
+                start_button.draw(screen)
+            elif previous_state == "game":
+                table_renderer.invalidate()
+                table_renderer.begin_frame()
+                run_game(startup, characters, deck)
+                table_renderer.end_frame(update=False)
+            draw_pause_menu()
+
+        # A transition covers the whole screen, so the table is fully repainted under it
+        if screen_transition:
+            screen_transition.draw(screen)
+            table_renderer.invalidate()
+            if screen_transition.done():
+                screen_transition = None
+            with frame_profiler.section('present'):
+                pygame.display.update()
+        # The game screen pushes its own dirty rects
+        elif game_state != "game":
+            with frame_profiler.section('present'):
+                pygame.display.update()
+
+        # Drawn last, over whatever was pushed, and not counted in the frame
+        frame_profiler.end_frame()
+        if show_profile_overlay:
+            pygame.display.update(frame_profiler.draw_overlay(screen, small_font, (SCREEN_WIDTH - 10, 180)))
+        clock.tick(60)
+
+    if hand_recorder is not None:
+        hand_recorder.close()
+    if remote_table is not None:
+        remote_table.close()
 
-    # Redraw window with updated background position
-    if game_state == "menu":
-        screen.blit(saloon_background, (background_x, 0))
-        screen.blit(saloon_background, (background_x + saloon_background.get_width(), 0))  # For seamless scrolling
-
-        place_welcome(SCREEN_WIDTH // 2 - welcome.get_width() // 2, SCREEN_HEIGHT // 1.6 - welcome.get_height())
-
-        # Check if the start button is clicked
-        if start_button.draw(screen):
-            fade(SCREEN_WIDTH, SCREEN_HEIGHT)
-            game_state = "game"
-
-        # Check if the settings button is clicked
-        if settings_button.draw(screen):
-            print("Settings button clicked from menu!")
-            previous_state = game_state
-            game_state = "pause"  # Change to pause menu or settings screen
-
-    elif game_state == "game":
-        startup, characters, deck, deck_pos = run_game(startup, characters, deck)
-
-        if settings_button.draw(screen):
-            previous_state = game_state
-            game_state = "pause"
-
-    elif game_state == "pause":
-        if previous_state == "menu":
-            screen.blit(saloon_background, (background_x, 0))
-            screen.blit(saloon_background, (background_x + saloon_background.get_width(), 0))
-            place_welcome(SCREEN_WIDTH // 2 - welcome.get_width() // 2, SCREEN_HEIGHT // 1.6 - welcome.get_height())
-            start_button.draw(screen)
-        elif previous_state == "game":
-            run_game(startup, characters, deck)
-        draw_pause_menu()
-
-    pygame.display.update()
-    clock.tick(60)
-
-# Quit Pygame
-pygame.quit()
-sys.exit()
+    if frame_profiler.enabled:
+        events = frame_profiler.export_trace(profile_trace_path)
+        print(f"Wrote {events} trace events to {profile_trace_path}")
+
+    # Quit Pygame
+    pygame.quit()
+    sys.exit()
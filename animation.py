@@ -0,0 +1,85 @@
+import time
+
+# --------------------------- Jobs --------------------------- #
+class Delay:
+    """A job that only takes time, e.g. a pause before the dealer plays."""
+    def __init__(self, duration, on_done=None):
+        self.duration = duration
+        self.on_done = on_done
+        self.start_time = 0.0  # Set by the scheduler
+
+    @property
+    def end_time(self):
+        return self.start_time + self.duration
+
+    def progress(self, now):
+        if self.duration <= 0:
+            return 1.0
+        return min(max((now - self.start_time) / self.duration, 0.0), 1.0)
+
+class CardMove(Delay):
+    """Moves an image in a straight line from `start` to `end` over `duration` seconds."""
+    def __init__(self, image, start, end, duration, on_done=None):
+        super().__init__(duration, on_done)
+        self.image = image
+        self.start = start
+        self.end = end
+
+    def position(self, now):
+        progress = self.progress(now)
+        return (
+            self.start[0] + (self.end[0] - self.start[0]) * progress,
+            self.start[1] + (self.end[1] - self.start[1]) * progress
+        )
+
+# --------------------------- Scheduler --------------------------- #
+class AnimationScheduler:
+    """
+    Runs timed jobs from the main loop instead of in nested loops, so events
+    keep being handled while cards move. Positions are interpolated from a
+    high-resolution clock, so they do not depend on the frame rate, and any
+    number of jobs can overlap.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.jobs = []
+
+    def now(self):
+        return self.clock()
+
+    def add(self, job, start_time=None):
+        # Queues a job to start at `start_time` (default: now) and returns it
+        job.start_time = self.now() if start_time is None else start_time
+        self.jobs.append(job)
+        return job
+
+    def busy_until(self):
+        # When the last queued job finishes, or now if nothing is queued
+        now = self.now()
+        return max([now] + [job.end_time for job in self.jobs])
+
+    def busy(self):
+        return bool(self.jobs)
+
+    def update(self):
+        """
+        Finishes every job whose time is up, in the order they end, and calls
+        their on_done callbacks. Call once per frame before drawing.
+        """
+        now = self.now()
+        finished = sorted((job for job in self.jobs if job.end_time <= now), key=lambda job: job.end_time)
+        if not finished:
+            return
+        self.jobs = [job for job in self.jobs if job.end_time > now]
+        for job in finished:
+            if job.on_done:
+                job.on_done()
+
+    def moving(self):
+        # (image, position) of every card move that has started and not landed
+        now = self.now()
+        return [(job.image, job.position(now)) for job in self.jobs
+                if isinstance(job, CardMove) and job.start_time <= now]
+
+    def clear(self):
+        self.jobs = []
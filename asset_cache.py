@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+import pygame
+import card_atlas
+
+# --------------------------- Image Specs --------------------------- #
+# Every image the game draws, at the size it is drawn at:
+#   name -> (source file, opaque, size rule)
+# Size rules:
+#   ('height', fraction)  scale to a fraction of the screen height, keeping the aspect ratio
+#   ('scale', factors)    scale by each factor in turn, truncating to whole pixels each time
+CACHE_FILE = 'asset_cache.bin'
+DEFAULT_SCREEN_SIZE = (800, 600)
+CARD_HEIGHT_FRACTION = 0.2  # Cards are drawn at 20% of the screen height
+
+IMAGE_SPECS = {
+    'saloon_background': ('saloon_background.jpg', True, ('height', 1.0)),
+    'table_background': ('table.jpg', True, ('height', 1.0)),
+    'welcome': ('welcome.png', False, ('height', 0.5)),
+    'start_image': ('start_button.png', False, ('scale', (1.5,))),
+    'play_again_image': ('start_button.png', False, ('scale', ())),
+    'settings_image': ('Setting.png', False, ('scale', (0.18,))),
+    'hit_image': ('hit_button.png', False, ('scale', ())),
+    'stand_image': ('stand_button.png', False, ('scale', ())),
+    'home_image': ('home.png', False, ('scale', (0.5, 0.25))),
+    'mute_image': ('mute.png', False, ('scale', (0.5, 0.19))),
+    'pause_image': ('Pause.png', False, ('scale', (0.5, 0.25))),
+    'next_image': ('next.png', False, ('scale', (0.5, 0.50))),
+    'previous_image': ('previous.png', False, ('scale', (0.5, 0.54))),
+}
+
+def card_spec(face):
+    # Spec name of a card face, e.g. card_spec('AH') -> 'card_AH'
+    return 'card_' + face
+
+for _face in card_atlas.CARD_FACES:
+    IMAGE_SPECS[card_spec(_face)] = (_face + '.png', False, ('height', CARD_HEIGHT_FRACTION))
+
+def load_source(images_folder, filename, opaque):
+    # Decodes a source image and converts it to the display's pixel format
+    image = pygame.image.load(os.path.join(images_folder, filename))
+    return image.convert() if opaque else image.convert_alpha()
+
+def prepare_image(image, rule, screen_size):
+    """
+    Scales a source image by its size rule.
+
+    :param image: The decoded source image.
+    :param rule: Size rule from IMAGE_SPECS.
+    :param screen_size: (width, height) of the game window.
+    """
+    kind, arg = rule
+    if kind == 'height':
+        height = int(screen_size[1] * arg)
+        width = int(image.get_width() * (height / image.get_height()))
+        return pygame.transform.scale(image, (width, height))
+    for factor in arg:
+        image = pygame.transform.scale(image, (int(image.get_width() * factor), int(image.get_height() * factor)))
+    return image
+
+# --------------------------- Manifest --------------------------- #
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def source_manifest(images_folder, filenames):
+    # filename -> modification time, size and content hash
+    manifest = {}
+    for filename in sorted(set(filenames)):
+        path = os.path.join(images_folder, filename)
+        stat = os.stat(path)
+        manifest[filename] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': file_hash(path)}
+    return manifest
+
+def changed_source(images_folder, manifest):
+    """
+    Returns the first source file that differs from the manifest, or None.
+    Files whose mtime and size still match are trusted; the rest are hashed,
+    so a file that was only touched or copied does not invalidate the cache.
+    """
+    for filename, entry in manifest.items():
+        path = os.path.join(images_folder, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return filename
+        if stat.st_mtime_ns == entry['mtime_ns'] and stat.st_size == entry['size']:
+            continue
+        if stat.st_size != entry['size'] or file_hash(path) != entry['sha1']:
+            return filename
+    return None
+
+# --------------------------- Cache File --------------------------- #
+# Layout: MAGIC, header length (uint32), JSON header, then the pixel data of
+# every image as BGRA rows, each block starting on a DATA_ALIGN boundary.
+MAGIC = b'BJASSET1'
+DATA_ALIGN = 64
+PIXEL_FORMAT = 'BGRA'
+
+def align(offset):
+    return (offset + DATA_ALIGN - 1) // DATA_ALIGN * DATA_ALIGN
+
+def display_masks():
+    return list(pygame.display.get_surface().get_masks()[:3])
+
+def build_cache(images_folder, screen_size=DEFAULT_SCREEN_SIZE, path=None):
+    """
+    Decodes and scales every image in IMAGE_SPECS and writes them, already in
+    the display's pixel format, to a single cache file. The display must be set up.
+
+    :param images_folder: Folder holding the source images.
+    :param screen_size: (width, height) the images are scaled for.
+    :param path: Output file; defaults to CACHE_FILE in the images folder.
+    :return: The written header.
+    """
+    path = path or os.path.join(images_folder, CACHE_FILE)
+    blocks = []
+    entries = {}
+    offset = 0
+    for name, (filename, opaque, rule) in IMAGE_SPECS.items():
+        image = prepare_image(load_source(images_folder, filename, opaque), rule, screen_size)
+        data = pygame.image.tobytes(image, PIXEL_FORMAT)
+        offset = align(offset)
+        entries[name] = {'offset': offset, 'size': list(image.get_size()), 'opaque': opaque}
+        blocks.append((offset, data))
+        offset += len(data)
+
+    header = {
+        'screen_size': list(screen_size),
+        'display_masks': display_masks(),
+        'specs': IMAGE_SPECS,
+        'sources': source_manifest(images_folder, [spec[0] for spec in IMAGE_SPECS.values()]),
+        'images': entries,
+    }
+    header_bytes = json.dumps(header).encode()
+    data_start = align(len(MAGIC) + 4 + len(header_bytes))
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+        for block_offset, data in blocks:
+            f.seek(data_start + block_offset)
+            f.write(data)
+    return header
+
+class ImageCache:
+    """
+    A memory-mapped cache file. Surfaces are built on request straight from the
+    mapped pages with pygame.image.frombuffer, so nothing is decoded or scaled
+    and only the pages of images actually drawn are read from disk.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError("not an asset cache file")
+        header_length, = struct.unpack_from('<I', self.map, len(MAGIC))
+        header_end = len(MAGIC) + 4 + header_length
+        self.header = json.loads(self.map[len(MAGIC) + 4:header_end])
+        self.data_start = align(header_end)
+        self.surfaces = {}
+
+    def stale_reason(self, images_folder, screen_size):
+        # Why the cache cannot be used for this window and these sources, or None
+        header = self.header
+        if tuple(header['screen_size']) != tuple(screen_size):
+            return f"it was built for a {header['screen_size'][0]}x{header['screen_size'][1]} window"
+        if header['display_masks'] != display_masks():
+            return "the display uses another pixel format"
+        # Compared through JSON, which is how the specs were stored
+        if header['specs'] != json.loads(json.dumps(IMAGE_SPECS)):
+            return "the image list has changed"
+        changed = changed_source(images_folder, header['sources'])
+        if changed:
+            return f"{changed} has changed"
+        return None
+
+    def surface(self, name):
+        surface = self.surfaces.get(name)
+        if surface is not None:
+            return surface
+        entry = self.header['images'].get(name)
+        if entry is None:
+            return None
+
+        width, height = entry['size']
+        start = self.data_start + entry['offset']
+        pixels = memoryview(self.map)[start:start + width * height * 4]
+        surface = pygame.image.frombuffer(pixels, (width, height), PIXEL_FORMAT)
+        if entry['opaque']:
+            # Opaque images blit several times faster without an alpha channel
+            surface = surface.convert()
+        self.surfaces[name] = surface
+        return surface
+
+def open_cache(images_folder, screen_size, path=None):
+    """
+    Opens the cache file if it is up to date for this window and the current
+    source images, otherwise returns None and says why. The display must be set up.
+    """
+    path = path or os.path.join(images_folder, CACHE_FILE)
+    if not os.path.isfile(path):
+        return None
+    try:
+        cache = ImageCache(path)
+        reason = cache.stale_reason(images_folder, screen_size)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not read the asset cache ({e}). Rebuild it with asset_cache.py.")
+        return None
+    if reason:
+        print(f"Asset cache is out of date: {reason}. Rebuild it with asset_cache.py.")
+        return None
+    return cache
+
+if __name__ == '__main__':
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Pre-scale every game image into a single memory-mappable cache file.")
+    parser.add_argument('--images', default=os.path.join(script_dir, 'images'), help="Folder holding the source images")
+    parser.add_argument('--width', type=int, default=DEFAULT_SCREEN_SIZE[0], help="Game window width")
+    parser.add_argument('--height', type=int, default=DEFAULT_SCREEN_SIZE[1], help="Game window height")
+    parser.add_argument('--output', help=f"Cache file (default: {CACHE_FILE} in the images folder)")
+    args = parser.parse_args()
+
+    # The pixel format comes from the display, so open a hidden window of the game's size
+    pygame.init()
+    pygame.display.set_mode((args.width, args.height), pygame.HIDDEN)
+    try:
+        header = build_cache(args.images, (args.width, args.height), args.output)
+    except FileNotFoundError as e:
+        print(f"Image not found: {e}")
+        sys.exit(1)
+    output = args.output or os.path.join(args.images, CACHE_FILE)
+    print(f"Cached {len(header['images'])} images in {output} ({os.path.getsize(output) / 1024 / 1024:.1f} MB)")
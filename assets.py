@@ -0,0 +1,54 @@
+import time
+
+# --------------------------- Asset Manager --------------------------- #
+class AssetManager:
+    """
+    Loads every asset once, the first time it is asked for. Loaders are
+    registered by name up front but only run from get(), so screens that are
+    never opened cost nothing at startup. Each load is timed for report().
+
+    A loader may get() other assets; their time is counted against them, not
+    against the loader that asked for them.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.loaders = {}
+        self.assets = {}
+        self.load_times = {}  # name -> seconds spent in its own loader
+        self.nested_time = 0.0  # Time spent in loaders called from the current loader
+
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    def get(self, name):
+        if name in self.assets:
+            return self.assets[name]
+
+        outer_nested = self.nested_time
+        self.nested_time = 0.0
+        start = self.clock()
+        asset = self.loaders[name]()
+        elapsed = self.clock() - start
+
+        self.load_times[name] = elapsed - self.nested_time
+        self.nested_time = outer_nested + elapsed
+        self.assets[name] = asset
+        return asset
+
+    def preload(self, names):
+        for name in names:
+            self.get(name)
+
+    def is_loaded(self, name):
+        return name in self.assets
+
+    def report(self):
+        # Per-asset load times, slowest first, with the total
+        lines = ["Asset load times:"]
+        for name, seconds in sorted(self.load_times.items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:<22}{seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<22}{sum(self.load_times.values()) * 1000:8.1f} ms")
+        deferred = [name for name in self.loaders if name not in self.assets]
+        if deferred:
+            lines.append(f"  Deferred until first use: {', '.join(deferred)}")
+        return "\n".join(lines)
@@ -0,0 +1,285 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import contextlib
+import tracemalloc
+import multiprocessing
+
+# The benchmark never opens a window or an audio device, so it runs on CI boxes
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import pygame
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then left out
+    resource = None
+
+# --------------------------- Settings --------------------------- #
+SCENES = ['menu', 'game_deal', 'dealer_draw', 'pause']
+FRAME_TIME = 1 / 60     # Simulated time per frame, so every run animates the same frames
+DEFAULT_FRAMES = 600
+WARMUP_FRAMES = 60      # Not measured; covers lazy asset loads and first-frame repaints
+ALLOC_FRAMES = 120      # Frames traced with tracemalloc, run separately since tracing is slow
+SEED = 1234
+DEFAULT_TOLERANCE = 0.10
+
+# --------------------------- Scripted Input --------------------------- #
+class ScriptedMouse:
+    """
+    Replaces pygame.mouse.get_pos/get_pressed so scenes can press buttons.
+    A click holds the left button over a rect for one frame.
+    """
+    def __init__(self):
+        self.pos = (-1, -1)
+        self.pressed = False
+
+    def click(self, rect):
+        self.pos = rect.center
+        self.pressed = True
+
+    def release(self):
+        self.pressed = False
+
+    def get_pos(self):
+        return self.pos
+
+    def get_pressed(self, num_buttons=3):
+        return (1 if self.pressed else 0,) + (0,) * (num_buttons - 1)
+
+# --------------------------- Scenes --------------------------- #
+class Scene:
+    """
+    Draws one frame of a game screen per call to frame(), through the game's
+    own drawing functions. Animations run on a simulated clock advanced by
+    FRAME_TIME per frame, so the frames drawn do not depend on machine speed.
+    """
+    def __init__(self, game, mouse):
+        self.game = game
+        self.mouse = mouse
+        self.now = 0.0
+        self.startup = False
+        self.characters = None
+        self.deck = None
+        game.SHOW_STRATEGY_HINT = False  # The solver thread would compete for the CPU
+        game.card_animations.clock = lambda: self.now
+
+    def frame(self):
+        self.now += FRAME_TIME
+        self.script()
+        self.draw()
+        self.mouse.release()
+
+    def script(self):
+        # Input for the coming frame
+        pass
+
+    def draw(self):
+        raise NotImplementedError
+
+    def draw_table(self, update=True):
+        game = self.game
+        game.table_renderer.begin_frame()
+        self.startup, self.characters, self.deck, _ = game.run_game(self.startup, self.characters, self.deck)
+        game.settings_button.draw(game.table_renderer)
+        return game.table_renderer.end_frame(update=update)
+
+    def dealt(self):
+        # A round is on the table and no card is still moving
+        return self.startup and not self.game.card_animations.busy()
+
+class MenuScene(Scene):
+    def draw(self):
+        game = self.game
+        game.scroll_background()
+        game.draw_menu()
+        game.start_button.draw(game.screen)
+        game.settings_button.draw(game.screen)
+        pygame.display.update()
+
+class GameDealScene(Scene):
+    # Deals round after round; the next deal starts once the last card has landed
+    def script(self):
+        if self.dealt():
+            self.startup = False
+
+    def draw(self):
+        self.draw_table()
+
+class DealerDrawScene(Scene):
+    # Stands on every hand, so the dealer draws, then plays the next round
+    def script(self):
+        if not self.dealt():
+            return
+        if self.game.game_over:
+            self.mouse.click(self.game.game_assets.get('play_again_button').rect)
+        else:
+            self.mouse.click(self.game.game_assets.get('stand_button').rect)
+
+    def draw(self):
+        self.draw_table()
+
+class PauseScene(Scene):
+    # The pause menu over a dealt table, drawn the way the main loop draws it
+    def draw(self):
+        game = self.game
+        game.table_renderer.invalidate()
+        self.draw_table(update=False)
+        game.draw_pause_menu()
+        pygame.display.update()
+
+SCENE_CLASSES = {'menu': MenuScene, 'game_deal': GameDealScene, 'dealer_draw': DealerDrawScene, 'pause': PauseScene}
+
+# --------------------------- Measurement --------------------------- #
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def percentile(sorted_values, fraction):
+    return sorted_values[int(fraction * (len(sorted_values) - 1))]
+
+def run_scene(name, frames=DEFAULT_FRAMES, warmup=WARMUP_FRAMES, alloc_frames=ALLOC_FRAMES, seed=SEED):
+    """
+    Imports the game headless, runs one scene and returns its measurements.
+    Meant to run in a fresh process so peak RSS belongs to this scene alone.
+    """
+    mouse = ScriptedMouse()
+    with contextlib.redirect_stdout(io.StringIO()):
+        pygame.mouse.get_pos = mouse.get_pos
+        pygame.mouse.get_pressed = mouse.get_pressed
+        import BlackjackPyGame as game
+        import history
+        random.seed(seed)
+        history.seed_source = random.Random(seed)  # Shoe seeds, so the same cards are dealt every run
+        scene = SCENE_CLASSES[name](game, mouse)
+
+        for _ in range(warmup):
+            scene.frame()
+
+        frame_times = []
+        start = time.perf_counter()
+        for _ in range(frames):
+            frame_start = time.perf_counter()
+            scene.frame()
+            frame_times.append(time.perf_counter() - frame_start)
+        elapsed = time.perf_counter() - start
+
+        # Per frame: the most memory allocated on top of what was live before it,
+        # and what was still held at the end of it
+        tracemalloc.start()
+        first = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for _ in range(alloc_frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            scene.frame()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - first
+        tracemalloc.stop()
+
+    frame_times.sort()
+    return {
+        'frames': frames,
+        'fps': frames / elapsed,
+        'frame_p50_ms': percentile(frame_times, 0.50) * 1000,
+        'frame_p99_ms': percentile(frame_times, 0.99) * 1000,
+        'alloc_peak_bytes_per_frame': sum(peaks) / len(peaks) if peaks else 0,
+        'retained_bytes_per_frame': retained / alloc_frames if alloc_frames else 0,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+def scene_worker(connection, *args):
+    connection.send(run_scene(*args))
+    connection.close()
+
+def run_benchmarks(scenes=SCENES, frames=DEFAULT_FRAMES, warmup=WARMUP_FRAMES, alloc_frames=ALLOC_FRAMES, seed=SEED):
+    # Every scene gets a fresh interpreter. A plain Process that exits on its own
+    # is used rather than a Pool: SDL turns SIGTERM into a quit event, so a pool
+    # worker with pygame loaded can outlive Pool.terminate().
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for name in scenes:
+        receiver, sender = context.Pipe(duplex=False)
+        worker = context.Process(target=scene_worker, args=(sender, name, frames, warmup, alloc_frames, seed))
+        worker.start()
+        sender.close()
+        try:
+            results[name] = receiver.recv()
+        except EOFError:
+            sys.exit(f"Scene {name} failed (exit code {worker.exitcode})")
+        finally:
+            worker.join()
+        print(f"{name:<12} {results[name]['fps']:9.1f} fps  p99 {results[name]['frame_p99_ms']:6.2f} ms")
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'video_driver': os.environ['SDL_VIDEODRIVER'],
+            'frames': frames,
+            'seed': seed,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenes': results,
+    }
+
+# --------------------------- Baseline --------------------------- #
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Prints each scene's change against the baseline and returns the list of
+    regressions: fps lower, or allocations or peak RSS higher, by more than
+    `tolerance`.
+    """
+    regressions = []
+    print(f"{'scene':<12}{'fps':>18}{'alloc/frame':>24}{'peak RSS':>22}")
+    for name, current in results['scenes'].items():
+        base = baseline['scenes'].get(name)
+        if base is None:
+            print(f"{name:<12} (not in baseline)")
+            continue
+
+        row = f"{name:<12}"
+        checks = [('fps', -1, 1.0), ('alloc_peak_bytes_per_frame', 1, 1024), ('peak_rss_bytes', 1, 1024 * 1024)]
+        for key, worse, unit in checks:
+            if current.get(key) is None or not base.get(key):
+                row += f"{'-':>22}"
+                continue
+            change = current[key] / base[key] - 1
+            row += f"{current[key] / unit:12.1f} ({change:+6.1%})"
+            if change * worse > tolerance:
+                regressions.append(f"{name}: {key} {change:+.1%}")
+        print(row)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark of the game's screens.")
+    parser.add_argument('--scenes', nargs='+', default=SCENES, choices=SCENES, help="Scenes to run")
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help="Measured frames per scene")
+    parser.add_argument('--seed', type=int, default=SEED, help="Seed for the shoe")
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the results")
+    parser.add_argument('--baseline', help="Results file to compare against; exits with 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed relative change before a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scenes, args.frames, seed=args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No regressions against the baseline.")
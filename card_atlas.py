@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import argparse
+import pygame
+import gamedata as g
+
+# --------------------------- Atlas Files --------------------------- #
+ATLAS_IMAGE = 'cards_atlas.png'
+ATLAS_INDEX = 'cards_atlas.json'
+ATLAS_COLUMNS = 13  # One suit per row
+DEFAULT_CARD_HEIGHT = 120  # 20% of the 600 pixel game window
+
+CARD_FACES = [rank + suit for suit in g.Card.suit for rank in g.Card.rank] + ['Blank']
+
+# --------------------------- Build Step --------------------------- #
+def build_atlas(images_folder, card_height=DEFAULT_CARD_HEIGHT, columns=ATLAS_COLUMNS):
+    """
+    Packs every '<rank><suit>.png' face plus 'Blank.png' into one atlas image and
+    writes an index mapping each card code to its rectangle in the atlas.
+
+    :param images_folder: Folder holding the card images; the atlas is written there too.
+    :param card_height: Height in pixels the faces are scaled to before packing.
+    :param columns: Number of cards per atlas row.
+    """
+    faces = []
+    for face in CARD_FACES:
+        path = os.path.join(images_folder, face + '.png')
+        image = pygame.image.load(path)
+        width = int(image.get_width() * (card_height / image.get_height()))
+        faces.append((face, pygame.transform.scale(image, (width, card_height))))
+
+    cell_width = max(image.get_width() for _, image in faces)
+    rows = (len(faces) + columns - 1) // columns
+    atlas = pygame.Surface((cell_width * columns, card_height * rows), pygame.SRCALPHA)
+
+    index = {'card_height': card_height, 'cards': {}}
+    for i, (face, image) in enumerate(faces):
+        x = (i % columns) * cell_width
+        y = (i // columns) * card_height
+        atlas.blit(image, (x, y))
+        index['cards'][face] = [x, y, image.get_width(), image.get_height()]
+
+    pygame.image.save(atlas, os.path.join(images_folder, ATLAS_IMAGE))
+    with open(os.path.join(images_folder, ATLAS_INDEX), 'w') as f:
+        json.dump(index, f, indent=1)
+    return index
+
+# --------------------------- Runtime Loader --------------------------- #
+def load_atlas(images_folder, card_height):
+    """
+    Decodes the atlas once and returns {card code: subsurface}, or None when no
+    atlas was built for this card height (callers then load the faces one by one).
+    The display must already be set up because the atlas is converted to its format.
+    """
+    index_path = os.path.join(images_folder, ATLAS_INDEX)
+    image_path = os.path.join(images_folder, ATLAS_IMAGE)
+    if not (os.path.isfile(index_path) and os.path.isfile(image_path)):
+        return None
+
+    with open(index_path) as f:
+        index = json.load(f)
+    if index.get('card_height') != card_height:
+        print(f"Card atlas was built for height {index.get('card_height')}, not {card_height}. Rebuild it with card_atlas.py.")
+        return None
+
+    atlas = pygame.image.load(image_path).convert_alpha()
+    return {face: atlas.subsurface(pygame.Rect(rect)) for face, rect in index['cards'].items()}
+
+if __name__ == '__main__':
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Pack the card images into a single sprite atlas.")
+    parser.add_argument('--images', default=os.path.join(script_dir, 'images'), help="Folder holding the card images")
+    parser.add_argument('--height', type=int, default=DEFAULT_CARD_HEIGHT, help="Card height in pixels")
+    args = parser.parse_args()
+
+    try:
+        index = build_atlas(args.images, args.height)
+    except FileNotFoundError as e:
+        print(f"Image not found: {e}")
+        sys.exit(1)
+    print(f"Packed {len(index['cards'])} cards into {os.path.join(args.images, ATLAS_IMAGE)}")
@@ -0,0 +1,175 @@
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+import engine
+import gamedata as g
+import server
+
+# --------------------------- Blocking Client --------------------------- #
+class TableClient:
+    """
+    One table on a table server, over a plain socket. Meant for the pygame
+    client, where a localhost round trip is far shorter than a frame.
+    """
+    def __init__(self, host=server.DEFAULT_HOST, port=server.DEFAULT_PORT, timeout=5.0):
+        self.connection = socket.create_connection((host, port), timeout=timeout)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.replies = self.connection.makefile('rb')
+
+    def request(self, action):
+        # Sends an action and returns the table's state; errors are raised as ValueError
+        self.connection.sendall(server.encode_message({'action': action}))
+        line = self.replies.readline()
+        if not line:
+            raise ConnectionError("the table server closed the connection")
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise ValueError(reply['error'])
+        return reply
+
+    def close(self):
+        self.replies.close()
+        self.connection.close()
+
+class RemoteRound:
+    """
+    Stands in for a one-seat engine.Round, with the rules played on the server.
+    Hands and counts are copied from each reply into the two Players. The
+    dealer's hole card is 'Blank' until the round is over, as the server does
+    not send it.
+    """
+    def __init__(self, client, player=None, dealer=None):
+        self.client = client
+        self.deck = None  # The shoe stays on the server
+        self.player = player if player is not None else g.Player(name='Player', card_pos_x=350, card_pos_y=350)
+        self.dealer = dealer if dealer is not None else g.Player(name='Dealer', card_pos_x=350, card_pos_y=50)
+        self.players = [self.player]
+        self.characters = [self.player, self.dealer]
+        self.results = [None]
+        self.turn = None
+        self.dealer_drawn = []
+        self.game_over = False
+        self.winner = None
+        self.result = 0
+
+    @property
+    def active(self):
+        return None if self.turn is None else self.player
+
+    def apply(self, state):
+        player, dealer = self.player, self.dealer
+        player.hand[:] = state['player']
+        player.bjcount = state['player_total']
+        player.softhand = state['player_soft']
+        dealer.hand[:] = [card or 'Blank' for card in state['dealer']]
+        if state['dealer_total'] is not None:
+            dealer.bjcount = state['dealer_total']
+        self.game_over = state['game_over']
+        self.result = state['outcome'] or 0
+        self.turn = None if self.game_over else 0
+        self.dealer_drawn = dealer.hand[2:]
+        if self.game_over:
+            self.results = [self.result]
+            self.winner = {1: player, -1: dealer}.get(self.result)
+
+    def deal(self):
+        # Returns the (character, card) pairs in deal order, like Round.deal
+        self.apply(self.client.request('deal'))
+        player, dealer = self.player, self.dealer
+        return [(player, player.hand[0]), (dealer, dealer.hand[0]), (player, player.hand[1]), (dealer, dealer.hand[1])]
+
+    def hit(self):
+        self.apply(self.client.request('hit'))
+        return self.player.hand[-1]
+
+    def stand(self):
+        # Returns the cards the dealer drew
+        self.apply(self.client.request('stand'))
+        return self.dealer_drawn
+
+    @property
+    def outcome(self):
+        return self.result if self.game_over else 0
+
+# --------------------------- Load Test --------------------------- #
+DEFAULT_THINK = 0.5  # Mean seconds a player takes between actions
+
+async def play_table(host, port, rounds, latencies, hit_below, think):
+    """
+    Plays `rounds` rounds on one table, hitting below `hit_below`, and appends
+    each action's round-trip time to `latencies`. Each action follows a pause of
+    0.5 to 1.5 times `think` seconds, so tables do not act in lockstep; with
+    think 0 every table plays as fast as the server answers.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    clock = time.perf_counter
+
+    async def act(action):
+        if think:
+            await asyncio.sleep(think * random.uniform(0.5, 1.5))
+        start = clock()
+        writer.write(server.encode_message({'action': action}))
+        reply = json.loads(await reader.readline())
+        latencies.append(clock() - start)
+        if 'error' in reply:
+            raise ValueError(reply['error'])
+        return reply
+
+    try:
+        for _ in range(rounds):
+            state = await act('deal')
+            while not state['game_over'] and state['player_total'] < hit_below:
+                state = await act('hit')
+            if not state['game_over']:
+                await act('stand')
+    finally:
+        writer.close()
+
+async def load_test(host, port, tables, rounds, think=DEFAULT_THINK, hit_below=engine.DEALER_STANDS_ON):
+    # Every table connects and starts playing at once; returns (latencies, seconds)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_table(host, port, rounds, latencies, hit_below, think) for _ in range(tables)))
+    return latencies, time.perf_counter() - start
+
+def start_server(port):
+    # A table server in a child process, so it does not share this process's event loop
+    process = subprocess.Popen([sys.executable, server.__file__, '--port', str(port)],
+                               stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # "Serving tables on ..."
+    return process
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test a table server with many tables playing at once.")
+    parser.add_argument('--host', default=server.DEFAULT_HOST, help="Table server address")
+    parser.add_argument('--port', type=int, default=server.DEFAULT_PORT, help="Table server port")
+    parser.add_argument('--tables', type=int, default=1000, help="Concurrent tables, one connection each")
+    parser.add_argument('--rounds', type=int, default=20, help="Rounds played on every table")
+    parser.add_argument('--think', type=float, default=DEFAULT_THINK, help="Mean seconds between a table's actions (0: as fast as possible)")
+    parser.add_argument('--spawn', action='store_true', help="Start a server on --port for the test")
+    args = parser.parse_args()
+
+    server.raise_open_file_limit()
+    process = start_server(args.port) if args.spawn else None
+    try:
+        latencies, elapsed = asyncio.run(load_test(args.host, args.port, args.tables, args.rounds, args.think))
+    except (OSError, ValueError) as e:
+        print(f"Load test failed: {e}")
+        sys.exit(1)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies.sort()
+    def percentile(fraction):
+        return latencies[int(fraction * (len(latencies) - 1))] * 1000
+
+    print(f"{args.tables} tables, {args.rounds} rounds each: {len(latencies)} actions in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} actions/sec)")
+    print(f"Action latency: p50 {percentile(0.50):.2f} ms  p99 {percentile(0.99):.2f} ms  max {latencies[-1] * 1000:.2f} ms")
@@ -0,0 +1,113 @@
+import math
+import gamedata as g
+
+# --------------------------- Systems --------------------------- #
+# Tag added to the running count for each rank, in Card.rank order: A 2 3 4 5 6 7 8 9 T J Q K,
+# and the key count of an unbalanced system (None for a balanced one).
+# A balanced system's tags sum to zero over a deck, so the count starts at zero and is
+# read as a true count: the running count per deck left.
+# KO is unbalanced: it starts at 4 - 4 * decks and is read as it runs, against its key
+# count of +4, where the player has the edge whatever the number of decks.
+SYSTEMS = {
+    'hilo':   ("Hi-Lo",    (-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1), None),
+    'ko':     ("KO",       (-1, 1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1), 4),
+    'omega2': ("Omega II", (0, 1, 1, 2, 2, 2, 1, 0, -1, -2, -2, -2, -2), None),
+}
+DECK_CARDS = len(g.CARD_NAMES)
+MAX_TRUE_COUNT = 10  # Histogram buckets run from -MAX_TRUE_COUNT to +MAX_TRUE_COUNT
+MAX_RUNNING_COUNT = 30  # and from -MAX_RUNNING_COUNT to +MAX_RUNNING_COUNT for an unbalanced system
+
+def card_tags(system):
+    # Tag of every card, keyed by both its code ('AH') and its compact id, so lookups never convert
+    name, rank_tags, key_count = SYSTEMS[system]
+    tags = {}
+    for card_id, card in enumerate(g.CARD_NAMES):
+        tags[card] = tags[card_id] = rank_tags[g.Card.rank.index(card[0])]
+    return tags
+
+MIN_CARDS_LEFT = DECK_CARDS // 2  # Fewer cards left are read as half a deck, so the divisor stays positive
+
+def true_count(running, cards_left):
+    # The running count per deck still in the shoe
+    return running * DECK_CARDS / max(cards_left, MIN_CARDS_LEFT)
+
+# --------------------------- Counter --------------------------- #
+class CardCounter:
+    """
+    Running and true count of one shoe for a counting system, updated in O(1)
+    per card. follow() hooks the counter into a shoe, so it sees every card
+    deal_card hands out and starts over on every shuffle.
+
+    index is the number play is judged by: the true count for a balanced system,
+    the running count for an unbalanced one (compare it with key_count).
+
+    :param system: One of SYSTEMS.
+    :param decks: Decks in the shoe being counted.
+    """
+    def __init__(self, system='hilo', decks=6):
+        if system not in SYSTEMS:
+            raise ValueError(f"Unknown counting system {system!r}; expected one of {', '.join(SYSTEMS)}")
+        self.system = system
+        self.name, _, self.key_count = SYSTEMS[system]
+        self.balanced = self.key_count is None
+        self.label = 'TC' if self.balanced else 'RC'  # How index is shown
+        self.tags = card_tags(system)
+        self.decks = decks
+        self.cards = decks * DECK_CARDS
+        self.start = 0 if self.balanced else self.key_count - 4 * decks
+        self.reset()
+
+    def reset(self):
+        self.running = self.start
+        self.seen = 0
+
+    def count(self, card):
+        self.running += self.tags[card]
+        self.seen += 1
+
+    def follow(self, shoe):
+        """
+        Wraps the shoe's deal_card and shuffle so every dealt card is counted and
+        every shuffle resets the count, as does a refill of a shoe that ran dry
+        mid-round. Cards dealt before this are not counted. Returns the shoe.
+        """
+        deal, shuffle, refill = shoe.deal_card, shoe.shuffle, shoe.refill
+        tags = self.tags
+
+        def deal_card():
+            card = deal()
+            self.running += tags[card]
+            self.seen += 1
+            return card
+
+        def counted_shuffle(seed=None):
+            shuffle(seed)
+            self.reset()
+
+        def counted_refill():
+            refill()
+            self.reset()
+
+        shoe.deal_card = deal_card
+        shoe.shuffle = counted_shuffle
+        shoe.refill = counted_refill
+        self.reset()
+        return shoe
+
+    @property
+    def true_count(self):
+        return true_count(self.running, self.cards - self.seen)
+
+    def index_of(self, running, seen):
+        # index for a running count after `seen` cards
+        return true_count(running, self.cards - seen) if self.balanced else running
+
+    @property
+    def index(self):
+        return self.index_of(self.running, self.seen)
+
+    @property
+    def bucket(self):
+        # index rounded down, clamped to the histogram's range
+        limit = MAX_TRUE_COUNT if self.balanced else MAX_RUNNING_COUNT
+        return max(-limit, min(limit, math.floor(self.index)))
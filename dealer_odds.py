@@ -0,0 +1,318 @@
+import os
+import sys
+import json
+import argparse
+import functools
+from collections import OrderedDict
+import gamedata as g
+import engine
+
+try:
+    import numpy as np
+except ImportError:  # dealer_distributions falls back to pure Python
+    np = None
+
+# --------------------------- Compositions --------------------------- #
+# A composition counts the cards left in the shoe by value: index 0 holds the
+# aces, 1-8 the twos to nines and 9 every ten-valued card (T, J, Q, K).
+VALUE_CLASSES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+CLASS_OF_VALUE = {value: i for i, value in enumerate(VALUE_CLASSES)}
+ACE = 0
+# Hands are (hard, aces) states like gamedata.HandState: the count with every ace
+# as 1, and whether there is an ace. HandState.score turns one into (total, soft).
+HARD_VALUES = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+UPCARD_NAMES = ('A', '2', '3', '4', '5', '6', '7', '8', '9', 'T')
+
+# Final dealer results: 17, 18, 19, 20, 21, then bust
+OUTCOMES = (17, 18, 19, 20, 21, 'bust')
+BUST = len(OUTCOMES) - 1
+
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dealer_tables.json')
+
+def value_class(card):
+    # Composition index of a card code or compact card
+    return CLASS_OF_VALUE[engine.get_card_value(card)]
+
+def composition(cards):
+    counts = [0] * len(VALUE_CLASSES)
+    for card in cards:
+        counts[value_class(card)] += 1
+    return tuple(counts)
+
+def full_composition(decks=1):
+    # Aces through nines four per deck, sixteen ten-valued cards per deck
+    return tuple(4 * decks for _ in range(9)) + (16 * decks,)
+
+def outcome_index(total):
+    return BUST if total > engine.BLACKJACK else total - engine.DEALER_STANDS_ON
+
+# --------------------------- Exact Calculator --------------------------- #
+# The dealer's result depends only on which cards they draw, not on their order,
+# and every order of the same cards is equally likely. So each upcard has a fixed
+# list of draws (the hole card and every hit) and a composition only reweights it:
+# a draw of n cards holding k_j of class j has probability
+#     orders * prod(ff(counts[j], k_j)) / ff(sum(counts), n)
+# where ff(c, k) = c * (c - 1) * ... * (c - k + 1). Draws that need more cards of
+# a class than are left get probability zero.
+NO_LOG = -1e6  # Stands in for log(0) so matrix products never see -inf * 0
+BATCH_SIZE = 256  # Compositions per numpy product, which keeps each product a few MB
+
+def start_state(i):
+    # (hard, aces) of a hand holding one card of value class i
+    return HARD_VALUES[i], i == ACE
+
+@functools.lru_cache(maxsize=None)
+def _draws_from(hard, aces):
+    # {cards drawn by class: number of orders they can be drawn in} until the dealer stands
+    total, soft = g.HandState.score(hard, aces)
+    if total >= engine.DEALER_STANDS_ON:
+        return {(0,) * len(VALUE_CLASSES): 1}
+    draws = {}
+    for i in range(len(VALUE_CLASSES)):
+        for drawn, orders in _draws_from(hard + HARD_VALUES[i], aces or i == ACE).items():
+            drawn = drawn[:i] + (drawn[i] + 1,) + drawn[i + 1:]
+            draws[drawn] = draws.get(drawn, 0) + orders
+    return draws
+
+@functools.lru_cache(maxsize=None)
+def dealer_draws(up):
+    """
+    Every set of cards the dealer can draw behind upcard class `up`, hole card
+    included, as (orders, cards drawn, outcome index, natural, ((class, count), ...)).
+    A natural is the hole card completing blackjack, which a peek rules out.
+    """
+    start_hard, start_aces = start_state(up)
+    rows = []
+    for drawn, orders in _draws_from(start_hard, start_aces).items():
+        hard = start_hard + sum(HARD_VALUES[j] * k for j, k in enumerate(drawn))
+        total = g.HandState.score(hard, start_aces or drawn[ACE] > 0)[0]
+        n = sum(drawn)
+        pairs = tuple((j, k) for j, k in enumerate(drawn) if k)
+        rows.append((orders, n, outcome_index(total), n == 1 and total == engine.BLACKJACK, pairs))
+    return tuple(rows)
+
+def _falling(c, k):
+    # ff(c, 0..k)
+    table = [1] * (k + 1)
+    for i in range(1, k + 1):
+        table[i] = table[i - 1] * max(c - i + 1, 0)
+    return table
+
+# Distributions already computed, least recently used first. Draw sets make a miss
+# cheap, but it still walks every draw set, and compositions recur across hands.
+DEALER_CACHE_SIZE = 200000  # (upcard class, composition, peeked) entries kept
+dealer_cache = OrderedDict()
+cache_stats = {'hits': 0, 'misses': 0}
+
+def _cache_get(key):
+    dist = dealer_cache.get(key)
+    if dist is None:
+        cache_stats['misses'] += 1
+        return None
+    cache_stats['hits'] += 1
+    dealer_cache.move_to_end(key)
+    return dist
+
+def _cache_put(key, dist):
+    dealer_cache[key] = dist
+    if len(dealer_cache) > DEALER_CACHE_SIZE:
+        dealer_cache.popitem(last=False)
+
+def cache_info():
+    return dict(cache_stats, entries=len(dealer_cache), maxsize=DEALER_CACHE_SIZE)
+
+def _distribution(up, counts, peeked):
+    # Pure-Python dealer_distribution for one composition
+    result = [0.0] * len(OUTCOMES)
+    remaining = sum(counts)
+    rows = dealer_draws(up)
+    longest = max(row[1] for row in rows)
+    falling = [_falling(c, longest) for c in counts]
+    total_falling = _falling(remaining, longest)
+    natural = 0.0
+    for orders, n, outcome, is_natural, pairs in rows:
+        ways = orders
+        for j, k in pairs:
+            ways *= falling[j][k]
+        if not ways:
+            continue
+        p = ways / total_falling[n]
+        if is_natural:
+            natural += p
+            if peeked:
+                continue
+        result[outcome] += p
+    if peeked:
+        live = 1.0 - natural
+        if live <= 0.0:
+            return tuple(0.0 for _ in result)
+        return tuple(p / live for p in result)
+    return tuple(result)
+
+@functools.lru_cache(maxsize=None)
+def _draw_matrices(up):
+    # numpy form of dealer_draws(up): a one-hot (class, count) matrix, log orders, sizes, outcomes, naturals
+    rows = dealer_draws(up)
+    width = max(row[1] for row in rows) + 1
+    picks = np.zeros((len(rows), len(VALUE_CLASSES) * width))
+    outcomes = np.zeros((len(rows), len(OUTCOMES)))
+    for r, (orders, n, outcome, is_natural, pairs) in enumerate(rows):
+        for j, k in pairs:
+            picks[r, j * width + k] = 1.0
+        outcomes[r, outcome] = 1.0
+    log_orders = np.log([row[0] for row in rows])
+    sizes = np.array([row[1] for row in rows])
+    naturals = np.array([row[3] for row in rows])
+    return width, picks, log_orders, sizes, outcomes, naturals
+
+def _log_falling(counts, width):
+    # log ff(counts, 0..width-1) along a new last axis, NO_LOG where ff is zero
+    steps = counts[..., None] - np.arange(width - 1)
+    logs = np.where(steps > 0, np.log(np.maximum(steps, 1)), NO_LOG)
+    return np.concatenate([np.zeros(counts.shape + (1,)), np.cumsum(logs, axis=-1)], axis=-1)
+
+def _distributions_numpy(up, compositions, peeked):
+    width, picks, log_orders, sizes, outcomes, naturals = _draw_matrices(up)
+    results = []
+    for start in range(0, len(compositions), BATCH_SIZE):
+        counts = np.array(compositions[start:start + BATCH_SIZE], dtype=float)
+        remaining = counts.sum(axis=1)
+        log_ways = _log_falling(counts, width).reshape(len(counts), -1) @ picks.T + log_orders
+        # Only the numerator may be NO_LOG: a draw longer than the shoe already needs a missing card
+        log_total = np.cumsum(np.log(np.maximum(remaining[:, None] - np.arange(width - 1), 1)), axis=1)
+        log_total = np.concatenate([np.zeros((len(counts), 1)), log_total], axis=1)
+        p = np.exp(log_ways - log_total[:, sizes])
+        if peeked:
+            live = 1.0 - p[:, naturals].sum(axis=1)
+            p[:, naturals] = 0.0
+            dist = p @ outcomes
+            dist = np.where(live[:, None] > 1e-12, dist / np.maximum(live, 1e-12)[:, None], 0.0)
+        else:
+            dist = p @ outcomes
+        results.extend(tuple(row) for row in dist.tolist())
+    return results
+
+def dealer_distribution(upcard, counts, peeked=False):
+    """
+    Exact probability of each final dealer result given the upcard and the
+    composition of the unseen cards (which still include the hole card).
+
+    :param upcard: The dealer's face-up card: a card code ('6H', or just the rank '6') or a compact card.
+    :param counts: Composition tuple of unseen cards, see composition().
+    :param peeked: Condition on the dealer not holding blackjack, which is
+                   known once the round has gone past the deal.
+    :return: Tuple of probabilities ordered like OUTCOMES. Draws that would
+             empty the shoe are left out, so it can sum to less than 1.
+    """
+    key = (value_class(upcard), tuple(counts), peeked)
+    dist = _cache_get(key)
+    if dist is None:
+        dist = _distribution(*key)
+        _cache_put(key, dist)
+    return dist
+
+def dealer_distributions(upcard, compositions, peeked=False):
+    """
+    dealer_distribution for many compositions behind the same upcard, as a list
+    in the same order. Uses numpy when it is installed, which is much faster.
+    Only the compositions missing from the cache are computed.
+    """
+    up = value_class(upcard)
+    keys = [(up, tuple(counts), peeked) for counts in compositions]
+    results = [_cache_get(key) for key in keys]
+    missing = [key for key, dist in zip(keys, results) if dist is None]
+    if np is None:
+        computed = [_distribution(*key) for key in missing]
+    else:
+        computed = _distributions_numpy(up, [key[1] for key in missing], peeked)
+    computed = dict(zip(missing, computed))
+    for key, dist in computed.items():
+        _cache_put(key, dist)
+    return [dist if dist is not None else computed[key] for key, dist in zip(keys, results)]
+
+# --------------------------- Infinite Deck Tables --------------------------- #
+INFINITE_WEIGHTS = (1 / 13,) * 9 + (4 / 13,)
+
+@functools.lru_cache(maxsize=None)
+def _dealer_infinite(hard, aces):
+    result = [0.0] * len(OUTCOMES)
+    total, soft = g.HandState.score(hard, aces)
+    if total >= engine.DEALER_STANDS_ON:
+        result[outcome_index(total)] = 1.0
+        return tuple(result)
+
+    for i, weight in enumerate(INFINITE_WEIGHTS):
+        for j, p in enumerate(_dealer_infinite(hard + HARD_VALUES[i], aces or i == ACE)):
+            result[j] += weight * p
+    return tuple(result)
+
+def compute_infinite_tables():
+    # {'no_peek' | 'peeked': {upcard name: distribution}} for an infinite shoe
+    tables = {'no_peek': {}, 'peeked': {}}
+    for up, name in enumerate(UPCARD_NAMES):
+        hard, aces = start_state(up)
+        no_peek = [0.0] * len(OUTCOMES)
+        peeked = [0.0] * len(OUTCOMES)
+        live = 0.0
+        for i, weight in enumerate(INFINITE_WEIGHTS):
+            hole = (hard + HARD_VALUES[i], aces or i == ACE)
+            dist = _dealer_infinite(*hole)
+            for j, p in enumerate(dist):
+                no_peek[j] += weight * p
+            if g.HandState.score(*hole)[0] != engine.BLACKJACK:
+                live += weight
+                for j, p in enumerate(dist):
+                    peeked[j] += weight * p
+        tables['no_peek'][name] = no_peek
+        tables['peeked'][name] = [p / live for p in peeked]
+    return tables
+
+def write_tables(path=TABLES_PATH):
+    data = {'dealer_stands_on': engine.DEALER_STANDS_ON, 'outcomes': [str(o) for o in OUTCOMES]}
+    data.update(compute_infinite_tables())
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+
+def load_tables(path=TABLES_PATH):
+    # Reads the shipped tables, recomputing them if the file is missing or stale
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('dealer_stands_on') == engine.DEALER_STANDS_ON:
+            return {key: {name: tuple(dist) for name, dist in data[key].items()} for key in ('no_peek', 'peeked')}
+        print(f"Dealer tables in {path} are for other rules. Recomputing them.")
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"Could not read dealer tables ({e}). Recomputing them.")
+    tables = compute_infinite_tables()
+    return {key: {name: tuple(dist) for name, dist in tables[key].items()} for key in tables}
+
+INFINITE_TABLES = load_tables()
+
+def infinite_deck_distribution(upcard, peeked=False):
+    # Table lookup for an infinite shoe, e.g. infinite_deck_distribution('6H')
+    name = UPCARD_NAMES[value_class(upcard)]
+    return INFINITE_TABLES['peeked' if peeked else 'no_peek'][name]
+
+def format_distribution(dist):
+    return "  ".join(f"{outcome}: {p:6.2%}" for outcome, p in zip(OUTCOMES, dist))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exact dealer final-total probabilities.")
+    parser.add_argument('--write-tables', action='store_true', help=f"Regenerate {os.path.basename(TABLES_PATH)}")
+    parser.add_argument('--decks', type=int, default=0, help="Shoe size for exact tables (0 = infinite deck)")
+    parser.add_argument('--peeked', action='store_true', help="Condition on the dealer not having blackjack")
+    args = parser.parse_args()
+
+    if args.write_tables:
+        write_tables()
+        print(f"Wrote {TABLES_PATH}")
+        sys.exit()
+
+    for up, name in enumerate(UPCARD_NAMES):
+        if args.decks > 0:
+            counts = list(full_composition(args.decks))
+            counts[up] -= 1
+            dist = dealer_distribution(name, counts, args.peeked)
+        else:
+            dist = infinite_deck_distribution(name, args.peeked)
+        print(f"Upcard {name}:  {format_distribution(dist)}")
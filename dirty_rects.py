@@ -0,0 +1,105 @@
+import pygame
+
+# --------------------------- Dirty Rect Renderer --------------------------- #
+class DirtyRectRenderer:
+    """
+    Stands in for the screen surface while a frame is drawn. Every blit is
+    recorded; at the end of the frame only the regions whose contents changed
+    since the last frame are restored from the background, redrawn and passed
+    to pygame.display.update.
+
+    Anything with a blit(image, pos) call (Button.draw, draw_centered_text, ...)
+    can draw onto the renderer instead of the screen.
+    """
+    def __init__(self, surface, background, background_pos=(0, 0)):
+        self.surface = surface
+        self.background = background
+        self.background_pos = background_pos
+        self.items = []     # (image, rect) blitted this frame, in draw order
+        self.previous = []  # Last frame's items; keeps their images alive for identity checks
+        self.full_redraw = True
+
+    def invalidate(self):
+        # Repaint the whole screen on the next frame, e.g. after something else drew over it
+        self.full_redraw = True
+
+    def begin_frame(self):
+        self.items = []
+
+    def blit(self, image, dest):
+        if isinstance(dest, pygame.Rect):
+            rect = pygame.Rect(dest.topleft, image.get_size())
+        else:
+            rect = pygame.Rect((int(dest[0]), int(dest[1])), image.get_size())
+        self.items.append((image, rect))
+        return rect
+
+    def get_width(self):
+        return self.surface.get_width()
+
+    def get_height(self):
+        return self.surface.get_height()
+
+    def dirty_rects(self):
+        # Rects of items that appeared, disappeared, moved or changed image since last frame
+        previous = {}
+        for image, rect in self.previous:
+            key = (id(image), tuple(rect))
+            previous[key] = previous.get(key, 0) + 1
+
+        dirty = []
+        for image, rect in self.items:
+            key = (id(image), tuple(rect))
+            if previous.get(key):
+                previous[key] -= 1
+            else:
+                dirty.append(rect)
+
+        for image, rect in self.previous:
+            key = (id(image), tuple(rect))
+            if previous.get(key):
+                previous[key] -= 1
+                dirty.append(rect)
+        return merge_rects(dirty)
+
+    def end_frame(self, update=True):
+        """
+        Composes the frame onto the screen and, if `update` is set, pushes the
+        changed regions to the display. Returns the list of rects that changed.
+        """
+        screen_rect = self.surface.get_rect()
+        if self.full_redraw:
+            dirty = [screen_rect]
+        else:
+            dirty = [rect.clip(screen_rect) for rect in self.dirty_rects()]
+            dirty = [rect for rect in dirty if rect.width and rect.height]
+
+        for region in dirty:
+            self.surface.set_clip(region)
+            self.surface.blit(self.background, self.background_pos)
+            for image, rect in self.items:
+                if rect.colliderect(region):
+                    self.surface.blit(image, rect)
+        self.surface.set_clip(None)
+
+        if update and dirty:
+            pygame.display.update(dirty)
+        self.previous = self.items
+        self.items = []
+        self.full_redraw = False
+        return dirty
+
+def merge_rects(rects):
+    # Unions overlapping rects so no pixel is restored or pushed twice
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
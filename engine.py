@@ -0,0 +1,167 @@
+import gamedata as g
+
+# --------------------------- Rules --------------------------- #
+# Pure game rules: no display, timing or audio calls, so rounds can be played
+# headless at full speed. The pygame GUI drives a Round and animates its results.
+BLACKJACK = 21
+DEALER_STANDS_ON = 17  # Dealer must draw to 16 and stand on 17
+CARDS_PER_HAND = 6  # Hands seldom take more; see round_reserve
+
+def get_card_value(card):
+    if isinstance(card, int):  # Compact card, see gamedata.CARD_VALUE
+        return g.CARD_VALUE[card]
+    elif card[0] in ['T', 'J', 'Q', 'K']:
+        return 10
+    elif card[0] == 'A':
+        return 11
+    else:
+        return int(card[0])
+
+def hand_total(cards):
+    # Score a list of cards the same way a Player's hand is scored (gamedata.HandState)
+    hand = g.HandState()
+    for card in cards:
+        hand.add_card(card, get_card_value(card))
+    return hand.bjcount
+
+# --------------------------- Round --------------------------- #
+MAX_SEATS = 7
+
+def round_reserve(seats=1):
+    # Cards a shoe keeps past its cut card (gamedata.Shoe reserve) so a round
+    # begun before the cut card can finish: CARDS_PER_HAND for every seat and the dealer
+    return CARDS_PER_HAND * (seats + 1)
+
+# Result of a hand that is still live when the dealer is done, by
+# [dealer's final total][player's total]: +1 win, -1 loss, 0 push.
+# Dealer totals over 21 are busts, which every live hand wins.
+SETTLEMENT = [[1 if dealer > BLACKJACK or total > dealer else -1 if total < dealer else 0
+               for total in range(BLACKJACK + 1)]
+              for dealer in range(2 * BLACKJACK)]
+
+class Round:
+    """
+    One round at a table of 1 to MAX_SEATS player seats and a dealer, dealt from
+    one shoe. Seats act in turn: hit() and stand() play the seat in `turn`. Once
+    every seat is done the dealer draws, if any hand is still live, and every
+    seat is settled at once. `results` holds each seat's +1/0/-1.
+
+    :param player: The player of a one-seat table.
+    :param players: The players of every seat, left to right; overrides `player`.
+    """
+    def __init__(self, deck, player=None, dealer=None, players=None):
+        if players is None:
+            players = [player if player is not None else g.Player(name='Player', card_pos_x=350, card_pos_y=350)]
+        if not 1 <= len(players) <= MAX_SEATS:
+            raise ValueError(f"A table has 1 to {MAX_SEATS} seats")
+        self.deck = deck
+        self.players = players
+        self.player = players[0]
+        self.dealer = dealer if dealer is not None else g.Player(name='Dealer', card_pos_x=350, card_pos_y=50)
+        self.characters = players + [self.dealer]
+        self.results = [None] * len(players)  # None while a seat's hand is undecided
+        self.turn = None  # Index of the seat to act
+        self.dealer_drawn = []
+        self.game_over = False
+        self.winner = None  # First seat's winner; None with game_over set means a tie
+
+    @property
+    def active(self):
+        # The player whose turn it is, or None
+        return None if self.turn is None else self.players[self.turn]
+
+    def deal(self):
+        """
+        Deals two cards to each seat then the dealer, in two passes. The dealer's
+        first card is the face-down one. A natural wins at once; a dealer natural
+        beats every other hand. Returns the (character, card) pairs in deal order.
+        """
+        dealt = []
+        deal_card = self.deck.deal_card
+        for character in self.characters * 2:
+            card = deal_card()
+            character.add_card(card, get_card_value(card))
+            dealt.append((character, card))
+
+        results = self.results
+        dealer_natural = self.dealer.blackjack
+        for i, player in enumerate(self.players):
+            if player.blackjack:
+                results[i] = 1
+            elif dealer_natural:
+                results[i] = -1
+        self.next_turn(0)
+        return dealt
+
+    def hit(self):
+        player = self.players[self.turn]
+        card = self.deck.deal_card()
+        player.add_card(card, get_card_value(card))
+        if player.bust:
+            self.results[self.turn] = -1  # Player busts, dealer wins
+            self.next_turn(self.turn + 1)
+        return card
+
+    def stand(self):
+        # Ends the current seat's turn. Returns the cards the dealer drew,
+        # which is none until the last seat has played.
+        self.next_turn(self.turn + 1)
+        return self.dealer_drawn
+
+    def next_turn(self, seat):
+        # Passes the turn to the first undecided seat from `seat` on, or to the dealer
+        results = self.results
+        for i in range(seat, len(results)):
+            if results[i] is None:
+                self.turn = i
+                return
+        self.turn = None
+
+        # Dealer draws to 16 and stands on 17 while any hand is live
+        dealer = self.dealer
+        if None in results:
+            deal_card = self.deck.deal_card
+            while dealer.bjcount < DEALER_STANDS_ON:
+                card = deal_card()
+                dealer.add_card(card, get_card_value(card))
+                self.dealer_drawn.append(card)
+        self.settle()
+
+    def settle(self):
+        # Every live hand against the dealer's total in one pass through SETTLEMENT
+        row = SETTLEMENT[self.dealer.bjcount]
+        self.results = [row[player.bjcount] if result is None else result
+                        for player, result in zip(self.players, self.results)]
+        self.game_over = True
+        first = self.results[0]
+        self.winner = self.player if first > 0 else self.dealer if first < 0 else None
+
+    @property
+    def outcome(self):
+        # First seat: +1 player win, -1 dealer win, 0 tie or unfinished
+        return self.results[0] if self.game_over else 0
+
+def play_round(deck, hit_below=DEALER_STANDS_ON, seats=1):
+    """
+    Plays one complete round headless and returns the finished Round.
+
+    :param deck: A shuffled Deck with enough cards for a round.
+    :param hit_below: Every player hits while their count is below this value.
+    :param seats: Player seats at the table.
+    """
+    players = None
+    if seats > 1:
+        players = [g.Player(name=f'Seat {i + 1}', card_pos_x=0, card_pos_y=0) for i in range(seats)]
+    game = Round(deck, players=players)
+    game.deal()
+    players = game.players
+    while game.turn is not None:
+        if players[game.turn].bjcount < hit_below:
+            game.hit()
+        else:
+            game.stand()
+    return game
+
+def play_hand(deck, hit_below=DEALER_STANDS_ON):
+    # Plays one complete round headless and returns its outcome (+1, 0 or -1)
+    return play_round(deck, hit_below).outcome
@@ -1,20 +1,66 @@
 import random
+from array import array
 
 class CardImg():
+    __slots__ = ()
+
     def __init__(self, x, y, image):
         pass
 
-class Player(CardImg):
-    def __init__(self, name, card_pos_x, card_pos_y):
-        self.name = name
+class HandState:
+    """
+    A hand and its blackjack count, updated in O(1) as each card is added.
+    Every ace is counted as 1 in `hard`; one of them counts 11 whenever that
+    does not bust the hand, which makes the hand soft. bjcount and softhand
+    are stored as the cards arrive, so reading them costs nothing.
+    """
+    __slots__ = ('hand', 'hard', 'aces', 'bjcount', 'softhand')
+
+    def __init__(self):
         self.hand = []
-        self.softhand = False
-        self.isplaying = bool
+        self.hard = 0  # Count with every ace as 1
+        self.aces = 0
         self.bjcount = 0
-        self.win = bool
+        self.softhand = False
+
+    @staticmethod
+    def score(hard, aces):
+        """
+        (bjcount, softhand) of a hand counting `hard` with every ace as 1. With any
+        aces, one of them counts 11 whenever that does not take the hand over 21.
+        This is the only place the ace rule lives; the odds calculators score
+        their (hard, aces) states with it too.
+        """
+        soft = aces > 0 and hard <= 11
+        return (hard + 10 if soft else hard), soft
+
+    def add_card(self, card, value):
+        # value is the card's blackjack value, 11 for an ace (engine.get_card_value)
+        self.hand.append(card)
+        if value == 11:
+            self.aces += 1
+            value = 1
+        self.hard += value
+        self.bjcount, self.softhand = HandState.score(self.hard, self.aces)
+
+    @property
+    def bust(self):
+        return self.bjcount > 21
+
+    @property
+    def blackjack(self):
+        # A natural: 21 with the first two cards
+        return self.bjcount == 21 and len(self.hand) == 2
+
+class Player(HandState, CardImg):
+    __slots__ = ('name', 'card_pos_x', 'card_pos_y')
+
+    def __init__(self, name, card_pos_x, card_pos_y):
+        super().__init__()
+        self.name = name
         self.card_pos_x = card_pos_x
         self.card_pos_y = card_pos_y
-       
+
 
 class Card:
     rank = ['A', '2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K']
@@ -22,20 +68,159 @@ class Card:
 
 
 
+# Compact cards are small ints: suit index * 13 + rank index, in generate_deck order.
+# The tables below turn one into its rank, suit, value or '<rank><suit>' name without parsing.
+CARD_NAMES = [rank + suit for suit in Card.suit for rank in Card.rank]
+CARD_IDS = {name: i for i, name in enumerate(CARD_NAMES)}
+CARD_RANK = bytes(i % len(Card.rank) for i in range(len(CARD_NAMES)))   # 0 = ace ... 12 = king
+CARD_SUIT = bytes(i // len(Card.rank) for i in range(len(CARD_NAMES)))  # index into Card.suit
+CARD_VALUE = bytes(11 if r == 0 else min(r + 1, 10) for r in CARD_RANK)  # aces count 11
+NO_CARD = 255  # Padding for fixed-width buffers of compact cards
+
+def encode_card(card):
+    # 'AH' -> 0; compact cards pass through unchanged
+    return CARD_IDS[card] if isinstance(card, str) else card
+
+def card_name(card):
+    # 0 -> 'AH'; the GUI loads '<rank><suit>.png' from this name
+    return card if isinstance(card, str) else CARD_NAMES[card]
+
 class Deck:
-    def __init__(self):
-        self.deck = []
+    def __init__(self, compact=False, rng=None):
+        # A compact deck stores cards as bytes in an array('B') instead of strings.
+        # rng shuffles the deck: a seeded random.Random, a NumPy Generator, or by default the random module.
+        self.compact = compact
+        self.deck = array('B') if compact else []
+        self.rng = rng if rng is not None else random
 
     def generate_deck(self):
+        if self.compact:
+            self.deck.extend(range(len(CARD_NAMES)))
+            return
+
         for suit in Card.suit:
             for rank in Card.rank:
                 card = rank + suit
                 self.deck.append(card)
         
 
-    def shuffle(self):
-        random.shuffle(self.deck)
+    def shuffle(self, seed=None):
+        # A seed shuffles with its own generator, so the same seed gives the same order
+        if seed is None:
+            self.rng.shuffle(self.deck)
+        else:
+            random.Random(seed).shuffle(self.deck)
 
     def deal_card(self):
         # Removes the last card in the shuffled deck and returns it
         return self.deck.pop()
+
+def randrange_of(rng):
+    # rng.randrange, or the same draw from a NumPy Generator, which has integers() instead
+    if hasattr(rng, 'randrange'):
+        return rng.randrange
+    if hasattr(rng, 'integers'):
+        integers = rng.integers
+        return lambda start, stop: int(integers(start, stop))
+    raise TypeError(f"rng must be a random.Random or a numpy.random.Generator, not {type(rng).__name__}")
+
+class Shoe:
+    """
+    Several decks dealt from one buffer that persists across rounds. The cut card
+    sits at `penetration` of the shoe; once it has been dealt, the shoe should be
+    shuffled before the next round.
+
+    Cards are dealt with `rng`, a seeded random.Random or numpy.random.Generator
+    (the random module by default), so every table can deal from its own
+    stream. A Generator draws one number per card; for bulk NumPy dealing pass
+    `shuffles` instead. With `shuffles`, an iterator of precomputed swap
+    lists (see shuffles.batched_shuffles), each shuffle takes the next list
+    and dealing draws no random numbers at all.
+
+    `reserve` is the number of cards that must be left past the cut card, so
+    a round begun before the cut card came out can finish (see
+    engine.round_reserve). A round that still runs the shoe dry carries on
+    from a fresh shoe, see refill().
+    """
+    def __init__(self, decks=6, penetration=0.75, compact=False, rng=None, shuffles=None, reserve=0):
+        if decks < 1:
+            raise ValueError("A shoe needs at least one deck")
+        if not 0 <= penetration < 1:
+            raise ValueError("Penetration must be at least 0 and below 1")
+
+        single = Deck(compact)
+        single.generate_deck()
+        self.decks = decks
+        self.penetration = penetration
+        self.cards = single.deck * decks  # Allocated once, shuffled in place
+        self.ordered = single.deck * decks  # Deck order, restored by seeded shuffles
+        self.cut_card = int(len(self.cards) * penetration)
+        if len(self.cards) - self.cut_card < reserve:
+            raise ValueError(f"Penetration {penetration} leaves {len(self.cards) - self.cut_card} cards past "
+                             f"the cut card of a {decks}-deck shoe; a round can need {reserve}")
+        self.position = 0  # Cards dealt since the last shuffle
+        self.refilled = False  # Ran dry mid-round; shuffled before the next round
+        self.seed = None
+        self.default_rng = rng if rng is not None else random
+        self.rng = self.default_rng
+        self.randrange = randrange_of(self.rng)  # Bound once; deal_card calls it for every card
+        self.shuffles = shuffles
+        self.swaps = next(shuffles) if shuffles is not None else None  # Card i is swapped with swaps[i]
+
+    def shuffle(self, seed=None):
+        """
+        Returns every card to the shoe. deal_card finishes the Fisher-Yates
+        shuffle one swap at a time, so this is O(1) and allocates nothing.
+
+        :param seed: Deals from a generator of its own seeded with this, starting
+            from deck order, so the shoe deals the same cards again for the same
+            seed. None deals from the shoe's rng or its next precomputed shuffle.
+        """
+        self.position = 0
+        self.seed = seed
+        self.refilled = False
+        if seed is None:
+            self.rng = self.default_rng
+            self.randrange = randrange_of(self.rng)
+            self.swaps = next(self.shuffles) if self.shuffles is not None else None
+        else:
+            self.cards[:] = self.ordered
+            self.rng = random.Random(seed)
+            self.randrange = self.rng.randrange
+            self.swaps = None
+
+    def refill(self):
+        """
+        Puts every card back when the shoe runs dry mid-round, so the round can
+        finish. The cards keep being drawn from the same generator, so a seeded
+        shoe deals the same cards again when its round is replayed. The shoe
+        then needs a proper shuffle before the next round.
+        """
+        self.position = 0
+        self.refilled = True
+        if self.swaps is not None:
+            self.swaps = next(self.shuffles)
+
+    def deal_card(self):
+        i = self.position
+        cards = self.cards
+        if i >= len(cards):
+            self.refill()
+            i = 0
+        swaps = self.swaps
+        j = self.randrange(i, len(cards)) if swaps is None else swaps[i]
+        cards[i], cards[j] = cards[j], cards[i]
+        self.position = i + 1
+        return cards[i]
+
+    @property
+    def needs_shuffle(self):
+        return self.position >= self.cut_card or self.refilled
+
+    @property
+    def deck(self):
+        # The undealt cards, in no particular order
+        return self.cards[self.position:]
+
+    def __len__(self):
+        return len(self.cards) - self.position
@@ -0,0 +1,68 @@
+import numpy as np
+import gamedata as g
+import engine
+
+# --------------------------- Encoding --------------------------- #
+# Hands are rows of rank codes: 1 = ace, 2-9, 10 = ten, 11-13 = J/Q/K.
+# 0 marks an empty slot, so hands of different lengths share one array.
+RANK_CODES = {rank: i + 1 for i, rank in enumerate(g.Card.rank)}
+
+# Rank code for every compact card id (gamedata.CARD_RANK); gamedata.NO_CARD maps to 0
+COMPACT_RANK_CODES = np.zeros(256, dtype=np.uint8)
+COMPACT_RANK_CODES[:len(g.CARD_RANK)] = np.frombuffer(g.CARD_RANK, dtype=np.uint8) + 1
+
+# Card value by rank code, aces as 1 like gamedata.HandState.hard
+HARD_VALUES = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10], dtype=np.int16)
+
+def encode_hands(hands, width=None):
+    """
+    Converts lists of card codes such as ['AH', 'TD'] into a 2-D rank-code array.
+
+    :param hands: Iterable of hands, each a list of card codes or compact cards.
+    :param width: Number of card slots per row (default: the longest hand).
+    """
+    hands = list(hands)
+    if width is None:
+        width = max((len(hand) for hand in hands), default=0)
+    codes = np.zeros((len(hands), width), dtype=np.uint8)
+    for row, hand in enumerate(hands):
+        for col, card in enumerate(hand):
+            codes[row, col] = RANK_CODES[g.card_name(card)[0]]
+    return codes
+
+def encode_compact(cards):
+    """
+    Converts a uint8 array of compact card ids (any shape, gamedata.NO_CARD as
+    padding) into rank codes with a single table lookup.
+    """
+    return COMPACT_RANK_CODES.take(np.asarray(cards, dtype=np.uint8))
+
+# --------------------------- Evaluation --------------------------- #
+def evaluate_hands(codes):
+    """
+    Scores many hands at once with the same rules as gamedata.HandState.
+    Loops over card slots only; every hand in a slot is handled in one array operation.
+
+    :param codes: 2-D integer array of rank codes, one row per hand.
+    :return: (totals, soft, bust, blackjack) arrays, one entry per hand.
+    """
+    codes = np.asarray(codes)
+    if codes.ndim != 2:
+        raise ValueError("codes must be a 2-D array with one hand per row")
+
+    rows = codes.shape[0]
+    totals = np.zeros(rows, dtype=np.int16)
+    aces = np.zeros(rows, dtype=bool)
+    # One contiguous row per card slot keeps the per-slot passes cache friendly
+    for ranks in np.ascontiguousarray(codes.T):
+        aces |= ranks == 1
+        totals += HARD_VALUES.take(ranks)
+
+    # One ace counts 11 wherever that does not bust the hand
+    soft = aces & (totals <= engine.BLACKJACK - 10)
+    totals += 10 * soft
+
+    cards = np.count_nonzero(codes, axis=1)
+    bust = totals > engine.BLACKJACK
+    blackjack = (cards == 2) & (totals == engine.BLACKJACK)
+    return totals, soft, bust, blackjack
@@ -0,0 +1,193 @@
+import os
+import sys
+import time
+import struct
+import argparse
+import gamedata as g
+import engine
+
+# --------------------------- Record Format --------------------------- #
+# A history file is a header followed by one fixed-size record per finished round:
+#   seed      uint64  seed the shoe was shuffled with (Shoe.shuffle)
+#   position  uint16  cards dealt from the shoe before the round
+#   hits      uint8   times the player hit; the round then ends by bust, or by standing
+#   outcome   int8    +1 player win, -1 dealer win, 0 tie
+# The round's cards are not stored: the seed and position deal them again.
+MAGIC = b'BJHIST01'
+HEADER = struct.Struct('<8sB')  # magic, decks in the shoe
+RECORD = struct.Struct('<QHBb')
+BATCH_HANDS = 4096  # Records buffered before they are written out
+
+seed_source = None  # A random.Random to draw shoe seeds from instead of the OS, so a run repeats (bench_render.py)
+
+def new_seed():
+    # Drawn from the OS by default, so seeding the random module does not repeat shoes
+    if seed_source is not None:
+        return seed_source.getrandbits(64)
+    return int.from_bytes(os.urandom(8), 'little')
+
+def read_header(f):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("file is too short to be a hand history")
+    magic, decks = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("not a hand history file")
+    return decks
+
+# --------------------------- Recorder --------------------------- #
+class HandRecorder:
+    """
+    Appends finished rounds to a history file. Records are packed into a buffer
+    and written BATCH_HANDS at a time; close() writes whatever is left.
+    The file is only created once the first batch is written.
+    """
+    def __init__(self, path, decks, batch=BATCH_HANDS):
+        self.path = path
+        self.decks = decks
+        self.batch_bytes = batch * RECORD.size
+        self.buffer = bytearray()
+        self.file = None
+        self.hands = 0
+
+        # Records are only meaningful for the shoe size in the file's header
+        if os.path.isfile(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                file_decks = read_header(f)
+            if file_decks != decks:
+                raise ValueError(f"{path} holds {file_decks}-deck hands, not {decks}-deck ones")
+
+    def record(self, seed, position, hits, outcome):
+        self.buffer += RECORD.pack(seed, position, hits, outcome)
+        self.hands += 1
+        if len(self.buffer) >= self.batch_bytes:
+            self.flush()
+
+    def write_packed(self, records, hands):
+        # Adds records already packed with RECORD, e.g. by simulator workers
+        self.buffer += records
+        self.hands += hands
+        if len(self.buffer) >= self.batch_bytes:
+            self.flush()
+
+    def record_round(self, game_round, seed, position):
+        """
+        Records a finished Round.
+
+        :param seed: Seed the round's shoe was shuffled with.
+        :param position: Cards dealt from the shoe before the round's deal.
+        """
+        hits = len(game_round.player.hand) - 2
+        self.record(seed, position, hits, game_round.outcome)
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+            if self.file.tell() == 0:
+                self.file.write(HEADER.pack(MAGIC, self.decks))
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_history(path):
+    """
+    Reads a history file and returns (decks, records), each record a
+    (seed, position, hits, outcome) tuple. A partly written last record,
+    left by a crash, is ignored.
+    """
+    with open(path, 'rb') as f:
+        decks = read_header(f)
+        data = f.read()
+    whole = len(data) - len(data) % RECORD.size
+    return decks, list(RECORD.iter_unpack(memoryview(data)[:whole]))
+
+# --------------------------- Replay --------------------------- #
+class Replayer:
+    """
+    Puts a shoe back in the state a recorded round started from. Records of the
+    same shoe are usually consecutive, so the shoe carries on from the last
+    round instead of being reshuffled and dealt up to the position again.
+    """
+    def __init__(self, decks, compact=True):
+        self.shoe = g.Shoe(decks, compact=compact)
+
+    def setup(self, seed, position):
+        shoe = self.shoe
+        if shoe.seed != seed or shoe.position > position:
+            shoe.shuffle(seed)
+        while shoe.position < position:
+            shoe.deal_card()
+        return shoe
+
+    def replay(self, record):
+        # Plays a record's round again and returns the finished Round
+        seed, position, hits, outcome = record
+        game = engine.Round(self.setup(seed, position))
+        game.deal()
+        for _ in range(hits):
+            if game.game_over:
+                break
+            game.hit()
+        if not game.game_over:
+            game.stand()
+        return game
+
+def replay_all(decks, records):
+    # Replays every record and returns the indices whose outcome came out different
+    replayer = Replayer(decks)
+    return [i for i, record in enumerate(records) if replayer.replay(record).outcome != record[3]]
+
+def describe(game):
+    player, dealer = game.player, game.dealer
+    lines = [f"  Player: {' '.join(g.card_name(card) for card in player.hand)} ({player.bjcount})",
+             f"  Dealer: {' '.join(g.card_name(card) for card in dealer.hand)} ({dealer.bjcount})"]
+    result = {1: "Player wins", -1: "Dealer wins", 0: "Tie"}[game.outcome]
+    return "\n".join(lines + [f"  {result}"])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a recorded hand history through the game engine.")
+    parser.add_argument('path', help="Hand history file")
+    parser.add_argument('--hand', type=int, nargs='+', help="Show these hands (0-based) card by card instead of replaying all")
+    args = parser.parse_args()
+
+    try:
+        decks, records = read_history(args.path)
+    except (OSError, ValueError) as e:
+        print(f"Could not read {args.path}: {e}")
+        sys.exit(1)
+    print(f"{len(records)} hands from a {decks}-deck shoe ({os.path.getsize(args.path) / 1024:.1f} KB)")
+
+    if args.hand:
+        replayer = Replayer(decks)
+        for i in args.hand:
+            if not 0 <= i < len(records):
+                print(f"Hand {i}: no such hand")
+                continue
+            seed, position, hits, outcome = records[i]
+            print(f"Hand {i}: seed {seed}, shoe position {position}, {hits} hit(s)")
+            print(describe(replayer.replay(records[i])))
+        sys.exit(0)
+
+    start = time.perf_counter()
+    mismatches = replay_all(decks, records)
+    elapsed = time.perf_counter() - start
+    rate = len(records) / elapsed if elapsed else 0.0
+    print(f"Replayed in {elapsed:.2f}s ({rate:,.0f} hands/sec)")
+    if mismatches:
+        print(f"{len(mismatches)} hands replayed to a different outcome, first: {mismatches[:10]}")
+        sys.exit(1)
+    print("Every hand replayed to its recorded outcome.")
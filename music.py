@@ -0,0 +1,160 @@
+import os
+import io
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+SUPPORTED_MUSIC_FORMATS = ['.ogg', '.mp3', '.wav']
+INDEX_FILE = '.music_index.json'
+
+# --------------------------- Folder Index --------------------------- #
+def index_folder(folder, formats=SUPPORTED_MUSIC_FORMATS):
+    """
+    Lists the playable files in `folder`. The listing is saved next to the
+    tracks together with the folder's mtime, which changes whenever a file is
+    added, removed or renamed, so later launches only stat the folder.
+    """
+    if not os.path.isdir(folder):
+        print(f"Music folder '{folder}' does not exist.")
+        return []
+
+    index_path = os.path.join(folder, INDEX_FILE)
+    mtime = os.stat(folder).st_mtime_ns
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        if index['mtime_ns'] == mtime and index['formats'] == list(formats):
+            return [os.path.join(folder, name) for name in index['files']]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    files = sorted(name for name in os.listdir(folder)
+                   if any(name.lower().endswith(ext) for ext in formats))
+    try:
+        # Creating the index file changes the folder's mtime, so it is created first
+        open(index_path, 'a').close()
+        index = {'mtime_ns': os.stat(folder).st_mtime_ns, 'formats': list(formats), 'files': files}
+        with open(index_path, 'w') as f:
+            json.dump(index, f)
+    except OSError:
+        pass  # A read-only folder is just indexed again next time
+    return [os.path.join(folder, name) for name in files]
+
+def read_track(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+# --------------------------- Player --------------------------- #
+class MusicPlayer:
+    """
+    Shuffled playlist on pygame.mixer.music that never touches the disk on the
+    main thread. A worker thread reads the next track into memory while the
+    current one plays, and the track is queued with pygame.mixer.music.queue so
+    it starts without a gap when the current one ends.
+
+    Call update() once per frame and handle_end_event() when `end_event` arrives.
+    """
+    def __init__(self, folder, end_event, volume=lambda: 1.0, formats=SUPPORTED_MUSIC_FORMATS):
+        self.end_event = end_event
+        self.volume = volume  # Called for the volume whenever a track is started
+        self.tracks = index_folder(folder, formats)
+        if not self.tracks:
+            print(f"No supported music files found in {folder}.")
+        random.shuffle(self.tracks)
+
+        self.loader = ThreadPoolExecutor(max_workers=1)
+        self.pending = {}      # path -> future of its bytes
+        self.index = 0         # Position of the current track in self.tracks
+        self.title = ""
+        self.requested = None  # Index to start as soon as its bytes are in memory
+        self.upcoming = None   # Index of the track after the current one
+        self.queued = None     # Index handed to pygame.mixer.music.queue
+
+        pygame.mixer.music.set_endevent(end_event)
+
+    def prefetch(self, index):
+        path = self.tracks[index]
+        if path not in self.pending:
+            self.pending[path] = self.loader.submit(read_track, path)
+        return self.pending[path]
+
+    def track_file(self, index):
+        # The prefetched bytes as a file object, with the name as a format hint
+        path = self.tracks[index]
+        return io.BytesIO(self.pending.pop(path).result()), os.path.basename(path)
+
+    def following(self, index):
+        # The whole list is reshuffled each time it has been played through
+        if index + 1 < len(self.tracks):
+            return index + 1
+        random.shuffle(self.tracks)
+        return 0
+
+    def play(self, index):
+        # Starts the track once its bytes are loaded; update() does the rest
+        if not self.tracks:
+            return
+        path = self.tracks[index]
+        # Skipped tracks' bytes are dropped rather than kept in memory
+        self.pending = {p: future for p, future in self.pending.items() if p == path}
+        self.requested = index
+        self.queued = None
+        self.prefetch(index)
+
+    def next(self):
+        if self.tracks:
+            self.play(self.upcoming if self.upcoming is not None else self.following(self.index))
+
+    def previous(self):
+        if self.tracks:
+            self.play((self.index - 1) % len(self.tracks))
+
+    def started(self, index):
+        self.index = index
+        self.title = os.path.splitext(os.path.basename(self.tracks[index]))[0]
+        print(f"Now playing: {self.title}")
+        self.upcoming = self.following(index)
+        self.prefetch(self.upcoming)
+
+    def update(self):
+        """
+        Starts a requested track whose bytes have arrived, and queues the next
+        track as soon as it has been read. Never waits on the worker.
+        """
+        if self.requested is not None:
+            future = self.pending.get(self.tracks[self.requested])
+            if future is None or not future.done():
+                return
+            index, self.requested = self.requested, None
+            try:
+                # Loading replaces the current track and empties pygame's queue
+                pygame.mixer.music.load(*self.track_file(index))
+                pygame.mixer.music.set_volume(self.volume())
+                pygame.mixer.music.play()
+            except (pygame.error, OSError) as e:
+                print(f"Failed to load the music file '{self.tracks[index]}': {e}")
+                return
+            self.started(index)
+
+        if self.upcoming is not None and self.queued is None:
+            future = self.pending.get(self.tracks[self.upcoming])
+            if future is None or not future.done():
+                return
+            try:
+                pygame.mixer.music.queue(*self.track_file(self.upcoming))
+                self.queued = self.upcoming
+            except (pygame.error, OSError) as e:
+                print(f"Failed to queue the music file '{self.tracks[self.upcoming]}': {e}")
+                self.upcoming = None
+
+    def handle_end_event(self):
+        # pygame posts end_event both when a queued track takes over and when
+        # playback stops with nothing queued
+        if self.requested is not None:
+            return  # A track is about to be started anyway
+        if self.queued is not None and pygame.mixer.music.get_busy():
+            index, self.queued = self.queued, None
+            self.started(index)
+        elif self.upcoming is not None:
+            self.play(self.upcoming)
@@ -0,0 +1,170 @@
+import json
+import time
+import threading
+import functools
+import contextlib
+from collections import deque
+import pygame
+
+# --------------------------- Frame Profiler --------------------------- #
+WINDOW_FRAMES = 300        # Frames the overlay statistics are taken over
+MAX_TRACE_EVENTS = 500000  # Trace events kept for export; later ones are dropped
+OVERLAY_REFRESH = 0.25     # Seconds between overlay redraws
+TOP_SECTIONS = 5
+
+class FrameProfiler:
+    """
+    Opt-in timing of the main loop. Sections are timed with
+    time.perf_counter_ns and kept both as per-frame totals, for the overlay,
+    and as individual events, for export in Chrome's trace format
+    (chrome://tracing or https://ui.perfetto.dev).
+
+    When disabled, wrap() returns functions unchanged and section() is a
+    no-op context, so the instrumentation costs next to nothing.
+    """
+    def __init__(self, enabled=False, window=WINDOW_FRAMES, max_events=MAX_TRACE_EVENTS, clock=time.perf_counter_ns):
+        self.enabled = enabled
+        self.clock = clock
+        self.max_events = max_events
+        self.frame_starts = deque(maxlen=window)
+        self.frame_times = deque(maxlen=window)     # Nanoseconds from begin_frame to end_frame
+        self.frame_sections = deque(maxlen=window)  # {section: nanoseconds} per frame
+        self.current = {}
+        self.frame_start = None
+        self.events = []  # (name, start ns, duration ns, thread id)
+        self.dropped_events = 0
+        self.overlay = None
+        self.overlay_time = 0
+
+    # ----- Recording ----- #
+    def record(self, name, start, duration):
+        self.current[name] = self.current.get(name, 0) + duration
+        if len(self.events) < self.max_events:
+            self.events.append((name, start, duration, threading.get_ident()))
+        else:
+            self.dropped_events += 1
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.clock()
+        self.frame_starts.append(self.frame_start)
+        self.current = {}
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        duration = self.clock() - self.frame_start
+        self.record('frame', self.frame_start, duration)
+        self.frame_times.append(duration)
+        self.frame_sections.append(self.current)
+        self.frame_start = None
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, start, self.clock() - start)
+
+    def section(self, name):
+        # with profiler.section('background_scroll'): ...
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed(name)
+
+    def wrap(self, name=None):
+        # Decorator timing every call of a function as one section
+        def decorate(func):
+            if not self.enabled:
+                return func
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = self.clock()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(label, start, self.clock() - start)
+            return wrapper
+        return decorate
+
+    # ----- Statistics ----- #
+    def stats(self):
+        """
+        FPS, frame time percentiles in milliseconds and the sections taking the
+        most time per frame, over the last `window` frames.
+        """
+        times = sorted(self.frame_times)
+        if not times:
+            return {'fps': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'top': []}
+
+        starts = self.frame_starts
+        elapsed = starts[-1] - starts[0]
+        fps = (len(starts) - 1) / (elapsed / 1e9) if elapsed else 0.0
+
+        totals = {}
+        for sections in self.frame_sections:
+            for name, duration in sections.items():
+                if name != 'frame':
+                    totals[name] = totals.get(name, 0) + duration
+        frames = len(self.frame_sections)
+        top = sorted(((name, total / frames / 1e6) for name, total in totals.items()), key=lambda item: -item[1])
+
+        return {
+            'fps': fps,
+            'p50_ms': times[int(0.50 * (len(times) - 1))] / 1e6,
+            'p99_ms': times[int(0.99 * (len(times) - 1))] / 1e6,
+            'top': top[:TOP_SECTIONS],
+        }
+
+    def draw_overlay(self, surface, font, topright=None):
+        """
+        Draws the statistics in a box on `surface` and returns its rect. The
+        text is only re-rendered every OVERLAY_REFRESH seconds.
+        """
+        now = self.clock()
+        if self.overlay is None or now - self.overlay_time > OVERLAY_REFRESH * 1e9:
+            stats = self.stats()
+            lines = [f"{stats['fps']:.0f} FPS   p50 {stats['p50_ms']:.2f} ms   p99 {stats['p99_ms']:.2f} ms"]
+            lines += [f"{name}: {ms:.2f} ms" for name, ms in stats['top']]
+            images = [font.render(line, True, (255, 255, 255)) for line in lines]
+
+            padding = 6
+            width = max(image.get_width() for image in images) + 2 * padding
+            height = sum(image.get_height() for image in images) + 2 * padding
+            self.overlay = pygame.Surface((width, height))
+            self.overlay.fill((20, 20, 20))
+            y = padding
+            for image in images:
+                self.overlay.blit(image, (padding, y))
+                y += image.get_height()
+            self.overlay_time = now
+
+        rect = self.overlay.get_rect()
+        rect.topright = topright or (surface.get_width() - 10, 10)
+        surface.blit(self.overlay, rect)
+        return rect
+
+    # ----- Export ----- #
+    def export_trace(self, path):
+        """
+        Writes every recorded section as a complete ('X') event in Chrome's
+        trace event format. Timestamps are in microseconds.
+        """
+        pid = 1
+        threads = {}
+        events = []
+        for name, start, duration, thread in self.events:
+            tid = threads.setdefault(thread, len(threads) + 1)
+            events.append({'name': name, 'ph': 'X', 'ts': start / 1000, 'dur': duration / 1000, 'pid': pid, 'tid': tid})
+        for thread, tid in threads.items():
+            name = 'main' if thread == threading.main_thread().ident else f'thread {tid}'
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'dropped_events': self.dropped_events}}, f)
+        return len(events)
@@ -0,0 +1,173 @@
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import gamedata as g
+import engine
+import history
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; the open file limit is then left alone
+    resource = None
+
+# --------------------------- Protocol --------------------------- #
+# Every connection is one table. Both sides send one JSON object per line.
+# Requests:
+#   {"action": "deal"}   start a round; a round still in play is given up, unrecorded
+#   {"action": "hit"}    one more card for the player
+#   {"action": "stand"}  the dealer draws and the round is settled
+# An "id" in a request is echoed in its reply. Every reply is the table's state:
+#   {"player": ["AH", "7C"], "player_total": 18, "player_soft": true,
+#    "dealer": [null, "TD"], "dealer_total": null, "game_over": false, "outcome": null}
+# The dealer's hole card and total are null until the round is over; outcome is
+# then +1 (player wins), -1 (dealer wins) or 0 (tie). A request that cannot be
+# played gets {"error": "..."} instead.
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+ACTIONS = ['deal', 'hit', 'stand']
+
+def encode_message(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+def round_state(game_round):
+    if game_round is None:
+        return {'player': [], 'player_total': 0, 'player_soft': False,
+                'dealer': [], 'dealer_total': None, 'game_over': False, 'outcome': None}
+    player, dealer = game_round.player, game_round.dealer
+    over = game_round.game_over
+    dealer_cards = [g.card_name(card) for card in dealer.hand]
+    if not over:
+        dealer_cards[0] = None
+    return {
+        'player': [g.card_name(card) for card in player.hand],
+        'player_total': player.bjcount,
+        'player_soft': player.softhand,
+        'dealer': dealer_cards,
+        'dealer_total': dealer.bjcount if over else None,
+        'game_over': over,
+        'outcome': game_round.outcome if over else None,
+    }
+
+# --------------------------- Tables --------------------------- #
+class Table:
+    """
+    One table: a shoe and the round in play. Rounds are played with the engine's
+    rules, which never wait, so a request is answered as soon as it is read.
+    Every shuffle is seeded so finished rounds can go to a hand history.
+    """
+    def __init__(self, decks, penetration, recorder=None):
+        self.shoe = g.Shoe(decks, penetration, compact=True, reserve=engine.round_reserve())
+        self.recorder = recorder
+        self.round = None
+        self.round_start = None  # (shoe seed, shoe position) until the round is recorded
+
+    def handle(self, action):
+        game_round = self.round
+        if action == 'deal':
+            # A client that left mid-round (e.g. back to its menu) starts over; the
+            # unfinished round cannot be replayed, so it is not recorded
+            shoe = self.shoe
+            if shoe.needs_shuffle or shoe.seed is None:
+                shoe.shuffle(history.new_seed())
+            self.round_start = (shoe.seed, shoe.position)
+            self.round = game_round = engine.Round(shoe)
+            game_round.deal()
+        elif action in ('hit', 'stand'):
+            if game_round is None or game_round.game_over:
+                return {'error': "no round in play; deal first"}
+            if action == 'hit':
+                game_round.hit()
+            else:
+                game_round.stand()
+        else:
+            return {'error': f"unknown action {action!r}; expected one of {', '.join(ACTIONS)}"}
+
+        if game_round.game_over and self.round_start is not None:
+            if self.recorder is not None:
+                self.recorder.record_round(game_round, *self.round_start)
+            self.round_start = None
+        return round_state(game_round)
+
+# --------------------------- Server --------------------------- #
+class TableServer:
+    def __init__(self, decks=6, penetration=0.75, recorder=None):
+        self.decks = decks
+        self.penetration = penetration
+        self.recorder = recorder
+        self.tables = 0  # Tables open right now
+        self.requests = 0
+
+    async def serve_table(self, reader, writer):
+        table = Table(self.decks, self.penetration, self.recorder)
+        self.tables += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    reply = table.handle(request.get('action'))
+                except (ValueError, AttributeError):
+                    request, reply = {}, {'error': "requests are JSON objects, one per line"}
+                if 'id' in request:
+                    reply['id'] = request['id']
+                self.requests += 1
+                writer.write(encode_message(reply))
+                await writer.drain()
+        except ConnectionError:
+            pass  # The client went away mid-reply
+        finally:
+            self.tables -= 1
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        # Serves until cancelled, or until SIGTERM where the loop supports signal handlers
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass
+        server = await asyncio.start_server(self.serve_table, host, port, backlog=1024)
+        print(f"Serving tables on {host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+def raise_open_file_limit():
+    # Every table is a socket, so allow as many as the system lets this process open
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Host many blackjack tables over a line-delimited JSON protocol.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--decks', type=int, default=6, help="Decks in every table's shoe")
+    parser.add_argument('--penetration', type=float, default=0.75, help="Fraction of a shoe dealt before reshuffling")
+    parser.add_argument('--record', help="Append every finished round to this hand history file")
+    args = parser.parse_args()
+
+    try:
+        g.Shoe(args.decks, args.penetration, reserve=engine.round_reserve())
+        recorder = history.HandRecorder(args.record, args.decks) if args.record else None
+    except (OSError, ValueError) as e:
+        print(f"Cannot start the server: {e}")
+        sys.exit(1)
+
+    raise_open_file_limit()
+    table_server = TableServer(args.decks, args.penetration, recorder)
+    try:
+        asyncio.run(table_server.serve(args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass  # Stopped with Ctrl+C or SIGTERM; the hand history is still flushed
+    finally:
+        if recorder is not None:
+            recorder.close()
+        print(f"Answered {table_server.requests} requests.")
@@ -0,0 +1,29 @@
+import numpy as np
+
+# --------------------------- Streams --------------------------- #
+DEFAULT_BATCH = 1024  # Shoes shuffled per vectorized call
+
+def stream(seed, index):
+    """
+    Independent PCG64 generator number `index` for a seed: the seed's generator
+    jumped `index` times by PCG64.jumped(index). Each jump advances the state
+    by the same stride of about 0.618 * 2**128 draws (the golden ratio fraction
+    of the period), so streams start far enough apart never to overlap in
+    practice, and stream `index` is the same whichever process creates it.
+    """
+    return np.random.Generator(np.random.PCG64(seed).jumped(index))
+
+# --------------------------- Batched Shuffles --------------------------- #
+def swap_indices(generator, shoes, cards):
+    """
+    Fisher-Yates swap targets for `shoes` shuffles of `cards` cards, drawn in
+    one call. Entry [k, i] is the position card i is swapped with when shoe k
+    deals it, uniform over i..cards-1, as Shoe.deal_card would draw it.
+    """
+    return generator.integers(np.arange(cards), cards, size=(shoes, cards), dtype=np.uint16)
+
+def batched_shuffles(generator, cards, batch=DEFAULT_BATCH):
+    # Endless swap lists for gamedata.Shoe(shuffles=...), generated `batch` shoes at a time
+    while True:
+        for swaps in swap_indices(generator, batch, cards):
+            yield swaps.tolist()
@@ -0,0 +1,244 @@
+import os
+import sys
+import time
+import random
+import argparse
+import multiprocessing
+import gamedata as g
+import engine
+import history
+import counting
+
+# --------------------------- Tallies --------------------------- #
+class Tally:
+    """Running win/tie/loss counts that can be merged as chunks finish."""
+    def __init__(self):
+        self.hands = 0
+        self.wins = 0
+        self.ties = 0
+        self.losses = 0
+
+    def add(self, outcome):
+        self.hands += 1
+        if outcome > 0:
+            self.wins += 1
+        elif outcome < 0:
+            self.losses += 1
+        else:
+            self.ties += 1
+
+    def merge(self, other):
+        self.hands += other.hands
+        self.wins += other.wins
+        self.ties += other.ties
+        self.losses += other.losses
+
+    @property
+    def house_edge(self):
+        # Average amount the house keeps per unit bet, paying even money on wins
+        if not self.hands:
+            return 0.0
+        return (self.losses - self.wins) / self.hands
+
+    def rates(self):
+        if not self.hands:
+            return 0.0, 0.0, 0.0
+        return self.wins / self.hands, self.ties / self.hands, self.losses / self.hands
+
+class CountHistogram:
+    """
+    Outcomes bucketed by the count at the start of each round: one Tally per
+    bucket (see counting.CardCounter.bucket), so memory stays the same however
+    many hands are played, and chunks merge bucket by bucket.
+    """
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, bucket, outcome):
+        tally = self.buckets.get(bucket)
+        if tally is None:
+            tally = self.buckets[bucket] = Tally()
+        tally.add(outcome)
+
+    def merge(self, other):
+        for bucket, tally in other.buckets.items():
+            self.buckets.setdefault(bucket, Tally()).merge(tally)
+
+# --------------------------- Worker --------------------------- #
+RNG_KINDS = ['python', 'pcg64']
+
+def make_shoe(decks, penetration, rng_kind, chunk_seed, root_seed, index, hands, seats=1):
+    """
+    The chunk's shoe, dealing from a generator of its own:
+      python  random.Random seeded with the chunk's seed, drawn card by card
+      pcg64   stream `index` of the simulation's NumPy PCG64 generator, shuffled in batches
+    """
+    if rng_kind == 'pcg64':
+        import shuffles  # NumPy is only needed for this generator
+        generator = shuffles.stream(root_seed, index)
+        # A shoe lasts dozens of hands, so a chunk needs far fewer shuffles than hands
+        batch = min(shuffles.DEFAULT_BATCH, hands // 10 + 1)
+        cards = decks * len(g.CARD_NAMES)
+        return g.Shoe(decks, penetration, compact=True, shuffles=shuffles.batched_shuffles(generator, cards, batch),
+                      reserve=engine.round_reserve(seats))
+    return g.Shoe(decks, penetration, compact=True, rng=random.Random(chunk_seed), reserve=engine.round_reserve(seats))
+
+def play_chunk(job):
+    """
+    Plays one chunk of hands in a worker process. Every chunk deals from its own
+    generator, so results do not depend on which process picks the chunk up.
+    Returns (pid, tally, seconds spent, packed history records or None,
+    CountHistogram or None).
+    """
+    chunk_seed, root_seed, index, hands, hit_below, seats, decks, penetration, rng_kind, record, count_system = job
+    shoe = make_shoe(decks, penetration, rng_kind, chunk_seed, root_seed, index, hands, seats)
+    tally = Tally()
+    records = bytearray() if record else None
+    histogram = counter = None
+    if count_system:
+        counter = counting.CardCounter(count_system, decks)
+        counter.follow(shoe)
+        histogram = CountHistogram()
+    start = time.perf_counter()
+    if record:
+        # Every shoe gets a seed of its own so each hand can be replayed alone
+        shoe.shuffle(shoe.default_rng.getrandbits(64))
+    for _ in range(hands):
+        if shoe.needs_shuffle:
+            shoe.shuffle(shoe.default_rng.getrandbits(64) if record else None)
+        position = shoe.position
+        bucket = counter.bucket if counter is not None else None
+        game = engine.play_round(shoe, hit_below, seats)
+        for outcome in game.results:
+            tally.add(outcome)
+            if histogram is not None:
+                histogram.add(bucket, outcome)
+        if record:
+            records += history.RECORD.pack(shoe.seed, position, len(game.player.hand) - 2, game.outcome)
+    return os.getpid(), tally, time.perf_counter() - start, records, histogram
+
+def make_jobs(hands, seed, chunk_size, hit_below, seats, decks, penetration, rng_kind='python', record=False,
+              count_system=None):
+    seeder = random.Random(seed)
+    root_seed = seeder.getrandbits(64)
+    jobs = []
+    remaining = hands
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        jobs.append((seeder.getrandbits(64), root_seed, len(jobs), size, hit_below, seats, decks, penetration,
+                     rng_kind, record, count_system))
+        remaining -= size
+    return jobs
+
+# --------------------------- Simulation --------------------------- #
+def simulate(hands, workers=None, seed=None, chunk_size=10000, hit_below=engine.DEALER_STANDS_ON,
+             decks=6, penetration=0.75, rng_kind='python', recorder=None, seats=1, count_system=None):
+    """
+    Plays `hands` rounds spread over a process pool and merges the chunk results
+    as they arrive. Every chunk deals from its own shoe.
+    Returns (total tally, {pid: (hands, seconds)}, CountHistogram or None).
+
+    :param rng_kind: Generator every chunk deals from, one of RNG_KINDS.
+    :param recorder: A history.HandRecorder every hand is appended to.
+    :param count_system: Counting system (see counting.SYSTEMS) to bucket outcomes by its count with.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = make_jobs(hands, seed, chunk_size, hit_below, seats, decks, penetration, rng_kind, recorder is not None,
+                     count_system)
+
+    total = Tally()
+    per_worker = {}
+    by_count = CountHistogram() if count_system else None
+    with multiprocessing.Pool(workers) as pool:
+        for pid, tally, seconds, records, histogram in pool.imap_unordered(play_chunk, jobs):
+            total.merge(tally)
+            if by_count is not None:
+                by_count.merge(histogram)
+            done, busy = per_worker.get(pid, (0, 0.0))
+            per_worker[pid] = (done + tally.hands, busy + seconds)
+            if recorder is not None:
+                recorder.write_packed(records, tally.hands)
+    return total, per_worker, by_count
+
+def print_report(total, per_worker, elapsed):
+    win_rate, tie_rate, loss_rate = total.rates()
+    print(f"Hands played: {total.hands}")
+    print(f"Win: {win_rate:.4%}  Tie: {tie_rate:.4%}  Loss: {loss_rate:.4%}")
+    print(f"House edge: {total.house_edge:.4%}")
+    print(f"Elapsed: {elapsed:.2f}s ({total.hands / elapsed:,.0f} hands/sec overall)")
+    for i, (pid, (hands, busy)) in enumerate(sorted(per_worker.items())):
+        rate = hands / busy if busy else 0.0
+        print(f"  Worker {i} (pid {pid}): {hands} hands, {rate:,.0f} hands/sec")
+
+def print_count_report(by_count, total, system):
+    # Player edge is the player's average result per unit bet, the house edge negated
+    name, _, key_count = counting.SYSTEMS[system]
+    if key_count is None:
+        print(f"Outcomes by {name} true count at the start of the round:")
+    else:
+        print(f"Outcomes by {name} running count at the start of the round (key count {key_count:+d}):")
+    label = 'TC' if key_count is None else 'RC'
+    print(f"  {label:>4} {'Hands':>12} {'Share':>7} {'Win':>8} {'Tie':>8} {'Loss':>8} {'Player edge':>12}")
+    for bucket, tally in sorted(by_count.buckets.items()):
+        win_rate, tie_rate, loss_rate = tally.rates()
+        print(f"  {bucket:>+4d} {tally.hands:>12,} {tally.hands / total.hands:>7.2%} {win_rate:>8.2%} "
+              f"{tie_rate:>8.2%} {loss_rate:>8.2%} {(tally.wins - tally.losses) / tally.hands:>+12.2%}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the blackjack rules.")
+    parser.add_argument('--hands', type=int, default=1000000, help="Number of rounds to play; each seat plays a hand per round")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible runs")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Hands per job sent to a worker")
+    parser.add_argument('--hit-below', type=int, default=engine.DEALER_STANDS_ON, help="Player hits while their count is below this")
+    parser.add_argument('--seats', type=int, default=1, help=f"Player seats at the table, 1 to {engine.MAX_SEATS}; every round plays a hand per seat")
+    parser.add_argument('--decks', type=int, default=6, help="Decks in the shoe")
+    parser.add_argument('--penetration', type=float, default=0.75, help="Fraction of the shoe dealt before reshuffling (0 reshuffles every round)")
+    parser.add_argument('--rng', choices=RNG_KINDS, default='python', help="Generator the shoes deal from (pcg64 needs NumPy)")
+    parser.add_argument('--record', help="Append every hand to this hand history file (see history.py)")
+    parser.add_argument('--count', choices=list(counting.SYSTEMS),
+                        help="Count the cards with this system and report outcomes by its count")
+    args = parser.parse_args()
+
+    if args.hands <= 0:
+        print("Number of hands must be positive.")
+        sys.exit(1)
+    if not 1 <= args.seats <= engine.MAX_SEATS:
+        print(f"A table has 1 to {engine.MAX_SEATS} seats.")
+        sys.exit(1)
+    try:
+        g.Shoe(args.decks, args.penetration, reserve=engine.round_reserve(args.seats))
+    except ValueError as e:
+        print(f"Invalid shoe: {e}")
+        sys.exit(1)
+    if args.record and args.seats != 1:
+        print("Hand history records hold one seat, so --record needs --seats 1.")
+        sys.exit(1)
+    if args.record and args.rng != 'python':
+        print("Recorded hands are replayed from per-shoe seeds, so --record needs --rng python.")
+        sys.exit(1)
+
+    recorder = None
+    if args.record:
+        try:
+            recorder = history.HandRecorder(args.record, args.decks)
+        except (OSError, ValueError) as e:
+            print(f"Cannot record to {args.record}: {e}")
+            sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        total, per_worker, by_count = simulate(args.hands, args.workers, args.seed, args.chunk_size, args.hit_below,
+                                               args.decks, args.penetration, args.rng, recorder, args.seats,
+                                               args.count)
+    except ValueError as e:
+        print(f"Invalid shoe: {e}")
+        sys.exit(1)
+    finally:
+        if recorder is not None:
+            recorder.close()
+    print_report(total, per_worker, time.perf_counter() - start)
+    if by_count is not None:
+        print_count_report(by_count, total, args.count)
+    if recorder is not None:
+        print(f"Recorded {recorder.hands} hands to {args.record}")
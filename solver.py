@@ -0,0 +1,231 @@
+import sys
+import time
+import argparse
+from collections import OrderedDict
+import gamedata as g
+import engine
+import dealer_odds as d
+
+# --------------------------- Transposition Table --------------------------- #
+ENTRY_OVERHEAD = 100  # Rough bytes per entry for the OrderedDict slot and its link
+
+def deep_sizeof(obj):
+    # Bytes of a key or value, counting every tuple and number inside it
+    size = sys.getsizeof(obj)
+    if isinstance(obj, tuple):
+        size += sum(deep_sizeof(item) for item in obj)
+    return size
+
+def entry_size(key, value):
+    return deep_sizeof(key) + deep_sizeof(value) + ENTRY_OVERHEAD
+
+class TranspositionTable:
+    """
+    Memoizes solved states in least-recently-used order and evicts the oldest
+    entries once the measured size of their keys and values goes over `max_bytes`.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.bytes -= entry_size(key, self.entries[key])
+        self.entries[key] = value
+        self.bytes += entry_size(key, value)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            old_key, old_value = self.entries.popitem(last=False)
+            self.bytes -= entry_size(old_key, old_value)
+            self.evictions += 1
+
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+# --------------------------- Solver --------------------------- #
+class Solver:
+    """
+    Exact expected value of hitting or standing, for the game's rules, given the
+    player's count, the dealer's upcard and every card the player has not seen.
+    EVs are per unit bet: +1 win, 0 tie, -1 loss.
+
+    Dealer distributions share the transposition table, and its byte budget,
+    with the solved states, keyed ('dealer', upcard class, composition).
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.table = TranspositionTable(max_bytes)
+        self.dealer = {}  # Distributions for the solve in progress, safe from eviction
+
+    def dealer_distribution(self, up, counts):
+        # Once the round is past the deal the dealer is known not to hold blackjack
+        dist = self.dealer.get(counts)
+        if dist is None:
+            dist = self.table.get(('dealer', up, counts))
+        if dist is None:
+            dist = d.dealer_distribution(d.UPCARD_NAMES[up], counts, peeked=True)
+            self.table.put(('dealer', up, counts), dist)
+        return dist
+
+    def stand_ev(self, total, up, counts):
+        dist = self.dealer_distribution(up, counts)
+        ev = dist[d.BUST]
+        for outcome, p in zip(d.OUTCOMES[:d.BUST], dist):
+            if total > outcome:
+                ev += p
+            elif total < outcome:
+                ev -= p
+        return ev
+
+    def solve(self, hard, aces, upcard, counts):
+        """
+        Returns (stand EV, hit EV) for a live hand.
+
+        :param hard: The player's count with every ace as 1 (HandState.hard).
+        :param aces: Whether the player holds an ace.
+        :param upcard: The dealer's face-up card.
+        :param counts: Composition of the unseen cards, including the dealer's hole card.
+        """
+        up, aces, counts = d.value_class(upcard), bool(aces), tuple(counts)
+        cached = self.table.get((hard, aces, up, counts))
+        if cached is not None:
+            return cached
+        self.prepare_dealer(hard, aces, up, counts)
+        try:
+            return self._solve(hard, aces, up, counts)
+        finally:
+            self.dealer = {}
+
+    def prepare_dealer(self, hard, aces, up, counts):
+        """
+        Computes, in one batch, the dealer distribution for every composition
+        the player can reach by hitting from (hard, aces) without busting, so
+        each is worked out once for the hand.
+        """
+        seen = set()
+        needed = {}
+        stack = [(hard, aces, counts)]
+        while stack:
+            state = stack.pop()
+            if state in seen:
+                continue
+            seen.add(state)
+            hard, aces, counts = state
+            if (hard, aces, up, counts) in self.table.entries:
+                continue  # Solved already, and so is everything after it
+            if counts not in needed:
+                needed[counts] = self.table.get(('dealer', up, counts))
+            for i, count in enumerate(counts):
+                if not count:
+                    continue
+                next_hard, next_aces = hard + d.HARD_VALUES[i], aces or i == d.ACE
+                if g.HandState.score(next_hard, next_aces)[0] <= engine.BLACKJACK:
+                    stack.append((next_hard, next_aces, counts[:i] + (count - 1,) + counts[i + 1:]))
+
+        missing = [counts for counts, dist in needed.items() if dist is None]
+        for counts, dist in zip(missing, d.dealer_distributions(d.UPCARD_NAMES[up], missing, peeked=True)):
+            needed[counts] = dist
+            self.table.put(('dealer', up, counts), dist)
+        self.dealer = needed
+
+    def _solve(self, hard, aces, up, counts):
+        key = (hard, aces, up, counts)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        stand = self.stand_ev(g.HandState.score(hard, aces)[0], up, counts)
+
+        remaining = sum(counts)
+        hit = 0.0
+        for i, count in enumerate(counts):
+            if not count:
+                continue
+            next_hard, next_aces = hard + d.HARD_VALUES[i], aces or i == d.ACE
+            if g.HandState.score(next_hard, next_aces)[0] > engine.BLACKJACK:
+                ev = -1.0
+            else:
+                drawn = counts[:i] + (count - 1,) + counts[i + 1:]
+                ev = max(self._solve(next_hard, next_aces, up, drawn))
+            hit += count / remaining * ev
+
+        result = (stand, hit)
+        self.table.put(key, result)
+        return result
+
+    def best_action(self, hard, aces, upcard, counts):
+        # ('hit' | 'stand', EV of that action)
+        stand, hit = self.solve(hard, aces, upcard, counts)
+        return ('hit', hit) if hit > stand else ('stand', stand)
+
+def unseen_composition(deck, dealer):
+    # What the player has not seen: the undealt cards plus the dealer's hole card
+    return d.composition(list(deck.deck) + [dealer.hand[0]])
+
+def solve_round(solver, game_round):
+    """
+    Best action for the seat whose turn it is in a live engine.Round.
+    Returns ('hit' | 'stand', EV), or None once the round is over.
+    """
+    if game_round.game_over or game_round.turn is None:
+        return None
+    player, dealer = game_round.active, game_round.dealer
+    counts = unseen_composition(game_round.deck, dealer)
+    return solver.best_action(player.hard, player.aces, dealer.hand[1], counts)
+
+# --------------------------- Starting States --------------------------- #
+def solve_starting_states(solver, decks=6):
+    """
+    Solves every two-card player hand against every upcard from a full shoe.
+    Returns {(first rank, second rank, upcard): (stand EV, hit EV)} using the
+    composition names in dealer_odds.UPCARD_NAMES.
+    """
+    names = d.UPCARD_NAMES
+    full = d.full_composition(decks)
+    results = {}
+    for a in range(len(names)):
+        for b in range(a, len(names)):
+            for up in range(len(names)):
+                counts = list(full)
+                for i in (a, b, up):
+                    counts[i] -= 1
+                hard, aces = d.HARD_VALUES[a] + d.HARD_VALUES[b], d.ACE in (a, b)
+                if g.HandState.score(hard, aces)[0] == engine.BLACKJACK:
+                    continue  # A natural ends the round at the deal
+                results[(names[a], names[b], names[up])] = solver.solve(hard, aces, names[up], counts)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exact hit/stand EVs for every starting hand.")
+    parser.add_argument('--decks', type=int, default=6, help="Decks in the shoe")
+    parser.add_argument('--max-mb', type=int, default=256, help="Transposition table memory cap in MB")
+    args = parser.parse_args()
+
+    solver = Solver(args.max_mb * 1024 * 1024)
+    start = time.perf_counter()
+    results = solve_starting_states(solver, args.decks)
+    elapsed = time.perf_counter() - start
+
+    names = d.UPCARD_NAMES
+    print("Hand  " + "  ".join(f"{up:>2}" for up in names))
+    for a in range(len(names)):
+        for b in range(a, len(names)):
+            row = []
+            for up in names:
+                evs = results.get((names[a], names[b], up))
+                row.append(' H' if evs and evs[1] > evs[0] else ' S' if evs else ' -')
+            print(f"{names[a]}{names[b]}    " + "  ".join(row))
+    print(f"Solved {len(results)} states in {elapsed:.1f}s; table {solver.table.stats()}")
@@ -0,0 +1,65 @@
+import pytest
+import animation
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+def scheduler():
+    clock = FakeClock()
+    return clock, animation.AnimationScheduler(clock)
+
+def test_card_move_interpolates_from_the_clock():
+    clock, jobs = scheduler()
+    move = jobs.add(animation.CardMove('card', (0, 0), (100, 50), 2.0))
+    assert jobs.moving() == [('card', (0.0, 0.0))]
+    clock.time = 1.0
+    assert jobs.moving() == [('card', (50.0, 25.0))]
+    clock.time = 5.0
+    assert move.position(clock.time) == (100, 50)
+
+def test_jobs_finish_in_end_order():
+    clock, jobs = scheduler()
+    done = []
+    jobs.add(animation.Delay(3.0, on_done=lambda: done.append('slow')))
+    jobs.add(animation.Delay(1.0, on_done=lambda: done.append('fast')))
+    jobs.add(animation.Delay(2.0, on_done=lambda: done.append('middle')))
+    clock.time = 2.5
+    jobs.update()
+    assert done == ['fast', 'middle'] and jobs.busy()
+    clock.time = 3.0
+    jobs.update()
+    assert done == ['fast', 'middle', 'slow'] and not jobs.busy()
+
+def test_queued_jobs_wait_for_their_start():
+    clock, jobs = scheduler()
+    first = jobs.add(animation.CardMove('a', (0, 0), (10, 0), 1.0))
+    second = jobs.add(animation.CardMove('b', (0, 0), (10, 0), 1.0), first.end_time)
+    assert jobs.busy_until() == pytest.approx(2.0)
+    assert [image for image, pos in jobs.moving()] == ['a']
+    clock.time = 1.5
+    jobs.update()
+    assert jobs.moving() == [('b', (5.0, 0.0))]
+    assert second.progress(clock.time) == pytest.approx(0.5)
+
+def test_busy_until_is_now_when_idle():
+    clock, jobs = scheduler()
+    clock.time = 4.0
+    assert jobs.busy_until() == 4.0 and not jobs.busy()
+
+def test_zero_length_jobs_are_done_at_once():
+    clock, jobs = scheduler()
+    done = []
+    jobs.add(animation.Delay(0.0, on_done=lambda: done.append(True)))
+    assert jobs.jobs[0].progress(clock.time) == 1.0
+    jobs.update()
+    assert done == [True]
+
+def test_clear_drops_every_job():
+    clock, jobs = scheduler()
+    jobs.add(animation.Delay(1.0))
+    jobs.clear()
+    assert not jobs.busy()
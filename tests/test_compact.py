@@ -0,0 +1,40 @@
+from array import array
+import pytest
+import gamedata as g
+import engine
+
+def test_names_and_ids_round_trip():
+    assert len(set(g.CARD_NAMES)) == len(g.Card.rank) * len(g.Card.suit)
+    for card_id, name in enumerate(g.CARD_NAMES):
+        assert g.encode_card(name) == card_id
+        assert g.card_name(card_id) == name
+        assert g.encode_card(card_id) == card_id
+        assert g.card_name(name) == name
+
+def test_tables_match_the_card_names():
+    for card_id, name in enumerate(g.CARD_NAMES):
+        assert g.Card.rank[g.CARD_RANK[card_id]] == name[0]
+        assert g.Card.suit[g.CARD_SUIT[card_id]] == name[1]
+        assert g.CARD_VALUE[card_id] == engine.get_card_value(name) == engine.get_card_value(card_id)
+
+def test_compact_deck_holds_every_card_once():
+    deck = g.Deck(compact=True)
+    deck.generate_deck()
+    assert isinstance(deck.deck, array) and deck.deck.typecode == 'B'
+    assert sorted(deck.deck) == list(range(len(g.CARD_NAMES)))
+
+    named = g.Deck()
+    named.generate_deck()
+    assert [g.card_name(card) for card in deck.deck] == named.deck
+
+def test_engine_scores_compact_and_named_cards_alike():
+    hands = [['AH', 'KD'], ['AH', 'AC', '9D'], ['TH', '6C', 'KD'], ['5S', '6S', 'AS']]
+    for cards in hands:
+        assert engine.hand_total([g.encode_card(card) for card in cards]) == engine.hand_total(cards)
+
+def test_encode_compact_matches_encode_hands():
+    np = pytest.importorskip('numpy')
+    import hand_eval
+    ids = np.arange(len(g.CARD_NAMES), dtype=np.uint8)
+    assert (hand_eval.encode_compact(ids) == hand_eval.encode_hands([g.CARD_NAMES])[0]).all()
+    assert hand_eval.encode_compact([g.NO_CARD])[0] == 0
@@ -0,0 +1,80 @@
+import random
+import pytest
+import gamedata as g
+import counting
+
+def test_tags_cover_every_card_by_code_and_id():
+    tags = counting.card_tags('hilo')
+    assert tags['AH'] == tags[g.CARD_IDS['AH']] == -1
+    assert tags['5D'] == 1 and tags['8C'] == 0 and tags['KS'] == -1
+
+@pytest.mark.parametrize('system, end', [('hilo', 0), ('omega2', 0), ('ko', 4)])
+def test_a_whole_shoe_counts_back_to_the_system_end(system, end):
+    counter = counting.CardCounter(system, decks=2)
+    shoe = counter.follow(g.Shoe(2, compact=True, rng=random.Random(1)))
+    for _ in range(len(shoe)):
+        shoe.deal_card()
+    assert counter.seen == 104
+    assert counter.running == end
+
+def test_ko_starts_below_zero():
+    assert counting.CardCounter('ko', decks=6).running == -20
+
+def test_following_a_shoe_resets_on_shuffle():
+    counter = counting.CardCounter('hilo', decks=1)
+    shoe = counter.follow(g.Shoe(1))
+    dealt = [shoe.deal_card() for _ in range(20)]
+    assert counter.seen == 20
+    assert counter.running == sum(counter.tags[card] for card in dealt)
+    shoe.shuffle()
+    assert (counter.running, counter.seen) == (0, 0)
+
+def test_following_a_shoe_resets_on_refill():
+    counter = counting.CardCounter('hilo', decks=1)
+    shoe = counter.follow(g.Shoe(1, 0.5))
+    for _ in range(len(shoe)):
+        shoe.deal_card()
+    dealt = [shoe.deal_card() for _ in range(3)]  # The shoe runs dry and is refilled
+    assert shoe.refilled
+    assert counter.seen == 3 and counter.running == sum(counter.tags[card] for card in dealt)
+    assert abs(counter.true_count) <= 3 * counting.DECK_CARDS / 49
+
+def test_true_count_is_per_deck_left():
+    assert counting.true_count(6, 156) == pytest.approx(2.0)
+    assert counting.true_count(-3, 26) == pytest.approx(-6.0)
+    # Below half a deck the divisor stops shrinking, and never reaches zero or less
+    assert counting.true_count(5, 10) == counting.true_count(5, 0) == counting.true_count(5, -4) == pytest.approx(10.0)
+
+def test_bucket_rounds_down_and_clamps():
+    counter = counting.CardCounter('hilo', decks=1)
+    counter.running, counter.seen = 3, 26  # True count +6
+    assert counter.bucket == 6
+    counter.running = -1  # -2
+    assert counter.bucket == -2
+    counter.running, counter.seen = 20, 50
+    assert counter.bucket == counting.MAX_TRUE_COUNT
+
+def test_ko_is_read_by_its_running_count():
+    counter = counting.CardCounter('ko', decks=6)
+    assert not counter.balanced and counter.label == 'RC' and counter.key_count == 4
+    counter.running, counter.seen = 2, 200
+    assert counter.index == 2 and counter.bucket == 2
+    counter.running = 45
+    assert counter.bucket == counting.MAX_RUNNING_COUNT
+    hilo = counting.CardCounter('hilo', decks=6)
+    assert hilo.balanced and hilo.label == 'TC' and hilo.key_count is None
+    assert hilo.index_of(6, 156) == pytest.approx(2.0)
+
+def test_unknown_system():
+    with pytest.raises(ValueError):
+        counting.CardCounter('wong')
+
+def test_histogram_merges_bucket_by_bucket():
+    import simulate
+    first, second = simulate.CountHistogram(), simulate.CountHistogram()
+    first.add(2, 1)
+    first.add(-1, -1)
+    second.add(2, 0)
+    first.merge(second)
+    assert first.buckets[2].hands == 2 and first.buckets[2].wins == 1 and first.buckets[2].ties == 1
+    assert first.buckets[-1].losses == 1
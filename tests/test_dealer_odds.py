@@ -0,0 +1,79 @@
+import itertools
+import pytest
+import engine
+import dealer_odds as d
+
+def test_composition():
+    assert d.composition(['AH', '2C', 'KD', 'TS', '9H']) == (1, 1, 0, 0, 0, 0, 0, 0, 1, 2)
+    assert d.full_composition(2) == (8,) * 9 + (32,)
+    assert sum(d.full_composition(1)) == 52
+
+def test_infinite_tables_sum_to_one():
+    for up in d.UPCARD_NAMES:
+        for peeked in (False, True):
+            assert sum(d.infinite_deck_distribution(up, peeked)) == pytest.approx(1.0)
+
+def test_shipped_tables_are_current():
+    tables = d.compute_infinite_tables()
+    for key in ('no_peek', 'peeked'):
+        for name in d.UPCARD_NAMES:
+            assert d.INFINITE_TABLES[key][name] == pytest.approx(tables[key][name], abs=1e-12)
+
+@pytest.mark.parametrize('decks', [1, 6])
+def test_exact_distributions_sum_to_one(decks):
+    for up, name in enumerate(d.UPCARD_NAMES):
+        counts = list(d.full_composition(decks))
+        counts[up] -= 1
+        for peeked in (False, True):
+            assert sum(d.dealer_distribution(name, counts, peeked)) == pytest.approx(1.0)
+
+@pytest.mark.parametrize('upcard, cards', [
+    ('6H', ['AH', '2C', '5D', 'TS', 'KC', '9H', '3S']),
+    ('AH', ['AC', '5D', '6S', 'TS', 'QC', '7H', '2S']),
+    ('TH', ['AC', 'AD', '4S', '6S', '7C', '8H', 'KS']),
+])
+def test_matches_dealing_every_order(upcard, cards):
+    # Plays the dealer out for every order of a small shoe; orders that run out of cards count for nothing
+    results = [0] * len(d.OUTCOMES)
+    orders = 0
+    for order in itertools.permutations(cards):
+        orders += 1
+        hand = [upcard]
+        for card in order:
+            hand.append(card)
+            if engine.hand_total(hand) >= engine.DEALER_STANDS_ON:
+                results[d.outcome_index(engine.hand_total(hand))] += 1
+                break
+    expected = [count / orders for count in results]
+    assert d.dealer_distribution(upcard, d.composition(cards)) == pytest.approx(expected, abs=1e-12)
+
+def test_peeked_ace_never_makes_a_natural():
+    counts = list(d.full_composition(6))
+    counts[0] -= 1
+    no_peek = d.dealer_distribution('A', counts)
+    peeked = d.dealer_distribution('A', counts, peeked=True)
+    tens = counts[9] / sum(counts)
+    # Without the peek, 21 includes every ten in the hole
+    assert no_peek[d.OUTCOMES.index(21)] == pytest.approx(tens + (1 - tens) * peeked[d.OUTCOMES.index(21)])
+
+@pytest.mark.parametrize('peeked', [False, True])
+def test_batches_match_single_compositions(peeked):
+    shoe = d.full_composition(1)
+    compositions = [shoe] + [shoe[:i] + (shoe[i] - 1,) + shoe[i + 1:] for i in range(len(shoe))]
+    compositions.append((1, 0, 0, 0, 0, 0, 0, 0, 0, 1))  # Too few cards for most draws
+    for up in d.UPCARD_NAMES:
+        batch = d.dealer_distributions(up, compositions, peeked)
+        single = [d.dealer_distribution(up, counts, peeked) for counts in compositions]
+        for got, expected in zip(batch, single):
+            assert got == pytest.approx(expected, abs=1e-12)
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(d, 'DEALER_CACHE_SIZE', 3)
+    monkeypatch.setattr(d, 'dealer_cache', d.OrderedDict())
+    shoe = d.full_composition(1)
+    first = d.dealer_distribution('5', shoe)
+    assert d.dealer_distribution('5H', shoe) is first  # Keyed by upcard class
+    d.dealer_distributions('5', [shoe[:i] + (shoe[i] - 1,) + shoe[i + 1:] for i in range(3)])
+    assert len(d.dealer_cache) == 3 and (d.value_class('5'), shoe, False) not in d.dealer_cache
+    assert d.cache_info()['maxsize'] == 3 and d.cache_info()['entries'] == 3
+    assert d.dealer_distribution('A', shoe, peeked=True) != d.dealer_distribution('A', shoe)
@@ -0,0 +1,58 @@
+import pytest
+
+pygame = pytest.importorskip('pygame')
+import dirty_rects
+
+def surfaces():
+    screen = pygame.Surface((200, 100))
+    background = pygame.Surface((200, 100))
+    background.fill((0, 80, 0))
+    sprite = pygame.Surface((10, 10))
+    sprite.fill((255, 255, 255))
+    return screen, background, sprite
+
+def frame(renderer, *blits):
+    renderer.begin_frame()
+    for image, pos in blits:
+        renderer.blit(image, pos)
+    return renderer.end_frame(update=False)
+
+def test_first_frame_and_invalidate_repaint_everything():
+    screen, background, sprite = surfaces()
+    renderer = dirty_rects.DirtyRectRenderer(screen, background)
+    assert frame(renderer, (sprite, (5, 5))) == [screen.get_rect()]
+    assert screen.get_at((6, 6)) == (255, 255, 255)
+    renderer.invalidate()
+    assert frame(renderer, (sprite, (5, 5))) == [screen.get_rect()]
+
+def test_an_unchanged_frame_repaints_nothing():
+    screen, background, sprite = surfaces()
+    renderer = dirty_rects.DirtyRectRenderer(screen, background)
+    frame(renderer, (sprite, (5, 5)))
+    assert frame(renderer, (sprite, (5, 5))) == []
+
+def test_a_move_repaints_the_old_and_new_spots():
+    screen, background, sprite = surfaces()
+    renderer = dirty_rects.DirtyRectRenderer(screen, background)
+    frame(renderer, (sprite, (5, 5)))
+    dirty = frame(renderer, (sprite, (100, 50)))
+    assert sorted(map(tuple, dirty)) == [(5, 5, 10, 10), (100, 50, 10, 10)]
+    assert screen.get_at((6, 6)) == (0, 80, 0)
+    assert screen.get_at((101, 51)) == (255, 255, 255)
+
+def test_a_new_image_in_the_same_spot_is_repainted():
+    screen, background, sprite = surfaces()
+    renderer = dirty_rects.DirtyRectRenderer(screen, background)
+    frame(renderer, (sprite, (5, 5)))
+    other = sprite.copy()
+    assert frame(renderer, (other, (5, 5))) == [pygame.Rect(5, 5, 10, 10)]
+
+def test_dirty_rects_are_clipped_to_the_screen():
+    screen, background, sprite = surfaces()
+    renderer = dirty_rects.DirtyRectRenderer(screen, background)
+    frame(renderer)
+    assert frame(renderer, (sprite, (195, 95))) == [pygame.Rect(195, 95, 5, 5)]
+
+def test_merge_rects_unions_overlaps():
+    merged = dirty_rects.merge_rects([(0, 0, 10, 10), (5, 5, 10, 10), (50, 50, 5, 5), (12, 12, 5, 5)])
+    assert sorted(map(tuple, merged)) == [(0, 0, 17, 17), (50, 50, 5, 5)]
@@ -0,0 +1,155 @@
+import pytest
+import gamedata as g
+import engine
+
+class StackedDeck:
+    # Deals the given cards in order
+    def __init__(self, cards):
+        self.cards = list(cards)
+
+    def deal_card(self):
+        return self.cards.pop(0)
+
+def seats(n):
+    return [g.Player(name=f'Seat {i + 1}', card_pos_x=0, card_pos_y=0) for i in range(n)]
+
+def test_card_values():
+    assert engine.get_card_value('AH') == 11
+    assert engine.get_card_value('KD') == 10
+    assert engine.get_card_value('7S') == 7
+
+def test_hand_total():
+    assert engine.hand_total(['AH', '6C']) == 17
+    assert engine.hand_total(['AH', '6C', 'TD']) == 17
+    assert engine.hand_total(['9H', '7C', '5D']) == 21
+    assert engine.hand_total(['TH', '6C', 'KD']) == 26
+
+# The deal goes player, dealer (face down), player, dealer
+def test_player_natural_wins_at_the_deal():
+    game = engine.Round(StackedDeck(['AH', '9C', 'KS', '7D']))
+    game.deal()
+    assert game.game_over and game.outcome == 1
+    assert game.winner is game.player
+
+def test_dealer_natural_beats_a_twenty():
+    game = engine.Round(StackedDeck(['KH', 'AC', 'QS', 'TD']))
+    game.deal()
+    assert game.game_over and game.outcome == -1
+
+def test_player_bust_loses_without_the_dealer_drawing():
+    deck = StackedDeck(['TH', '6C', '5S', '7D', 'KC', '9C'])
+    game = engine.Round(deck)
+    game.deal()
+    game.hit()
+    assert game.game_over and game.outcome == -1
+    assert deck.cards == ['9C']
+
+def test_dealer_draws_to_seventeen_and_busts():
+    game = engine.Round(StackedDeck(['TH', '6C', '8S', 'TD', '9C']))
+    game.deal()
+    assert game.stand() == ['9C']
+    assert game.dealer.bjcount == 25
+    assert game.outcome == 1
+
+def test_dealer_stands_on_soft_seventeen():
+    game = engine.Round(StackedDeck(['TH', 'AC', '8S', '6D']))
+    game.deal()
+    assert game.stand() == []
+    assert game.outcome == 1
+
+def test_higher_dealer_total_wins():
+    game = engine.Round(StackedDeck(['TH', 'TC', '7S', '9D']))
+    game.deal()
+    game.stand()
+    assert game.outcome == -1 and game.winner is game.dealer
+
+def test_equal_totals_push():
+    game = engine.Round(StackedDeck(['TH', 'TC', '8S', '8D']))
+    game.deal()
+    game.stand()
+    assert game.game_over and game.outcome == 0 and game.winner is None
+
+def test_play_hand_hits_below_the_threshold():
+    # 5 + 6 hits to 21, the dealer's 16 draws a ten and busts
+    deck = StackedDeck(['5H', 'TC', '6S', '6D', 'KH', 'QC'])
+    assert engine.play_hand(deck, hit_below=17) == 1
+    assert deck.cards == []
+
+def test_play_hand_finishes_from_a_full_deck():
+    for _ in range(50):
+        deck = g.Deck()
+        deck.generate_deck()
+        deck.shuffle()
+        assert engine.play_hand(deck) in (1, 0, -1)
+
+def test_settlement_table():
+    for dealer in range(engine.DEALER_STANDS_ON, 2 * engine.BLACKJACK):
+        for total in range(engine.BLACKJACK + 1):
+            expected = 1 if dealer > engine.BLACKJACK or total > dealer else -1 if total < dealer else 0
+            assert engine.SETTLEMENT[dealer][total] == expected
+
+def test_multi_seat_round_settles_every_seat():
+    # Seats 1-3 then the dealer, twice; seat 1 busts, seat 2 stands on 20, seat 3 on 17
+    deck = StackedDeck(['TH', 'TC', '9S', '6D',
+                        '5H', 'QD', '8C', 'TS',
+                        'KH', '4C'])
+    game = engine.Round(deck, players=seats(3))
+    game.deal()
+    assert game.turn == 0 and game.active is game.players[0]
+    game.hit()  # 15 + K busts
+    assert game.results[0] == -1 and game.turn == 1
+    game.stand()
+    assert game.turn == 2
+    drawn = game.stand()
+    assert drawn == ['4C']  # Dealer 16 draws to 20
+    assert game.game_over and game.active is None
+    assert game.results == [-1, 0, -1]
+
+def test_a_natural_seat_is_paid_and_skipped():
+    deck = StackedDeck(['AH', '9C', '6D',
+                        'KH', '8S', 'TD',
+                        '5C'])
+    game = engine.Round(deck, players=seats(2))
+    game.deal()
+    assert game.results == [1, None] and game.turn == 1
+    assert game.stand() == ['5C']
+    assert game.results == [1, -1]  # The natural is paid even though the dealer makes 21
+
+def test_multi_seat_naturals_against_a_dealer_natural():
+    deck = StackedDeck(['AH', '9C', 'AD',
+                        'KH', '9S', 'QD'])
+    game = engine.Round(deck, players=seats(2))
+    game.deal()
+    assert game.game_over and game.results == [1, -1]
+
+def test_the_dealer_does_not_draw_when_every_seat_has_busted():
+    deck = StackedDeck(['TH', 'TC', '6D',
+                        '5H', '6C', 'TS',
+                        'KH', 'KC', '9D'])
+    game = engine.Round(deck, players=seats(2))
+    game.deal()
+    game.hit()
+    assert game.turn == 1
+    game.hit()
+    assert game.game_over and game.results == [-1, -1]
+    assert game.dealer_drawn == [] and deck.cards == ['9D']
+
+def test_seat_limits():
+    with pytest.raises(ValueError):
+        engine.Round(StackedDeck([]), players=seats(engine.MAX_SEATS + 1))
+    with pytest.raises(ValueError):
+        engine.Round(StackedDeck([]), players=[])
+
+def test_play_round_finishes_every_seat():
+    shoe = g.Shoe(6)
+    for _ in range(30):
+        if shoe.needs_shuffle:
+            shoe.shuffle()
+        game = engine.play_round(shoe, seats=engine.MAX_SEATS)
+        assert game.game_over and None not in game.results
+
+def test_the_reserve_grows_with_the_seats():
+    assert engine.round_reserve(7) > engine.round_reserve(1) == 2 * engine.CARDS_PER_HAND
+    g.Shoe(6, 0.75, reserve=engine.round_reserve(7))
+    with pytest.raises(ValueError):
+        g.Shoe(2, 0.75, reserve=engine.round_reserve(7))
@@ -0,0 +1,39 @@
+import random
+import pytest
+import gamedata as g
+import engine
+
+np = pytest.importorskip('numpy')
+import hand_eval
+
+def scored(cards):
+    player = g.Player(name='Player', card_pos_x=0, card_pos_y=0)
+    for card in cards:
+        player.add_card(card, engine.get_card_value(card))
+    return player
+
+def random_hands(count, seed=3):
+    rng = random.Random(seed)
+    names = [rank + suit for suit in g.Card.suit for rank in g.Card.rank]
+    return [[rng.choice(names) for _ in range(rng.randint(1, 8))] for _ in range(count)]
+
+def test_evaluate_hands_matches_the_engine():
+    hands = random_hands(2000)
+    totals, soft, bust, blackjack = hand_eval.evaluate_hands(hand_eval.encode_hands(hands))
+    for i, cards in enumerate(hands):
+        player = scored(cards)
+        assert totals[i] == engine.hand_total(cards) == player.bjcount
+        assert soft[i] == player.softhand
+        assert bust[i] == (player.bjcount > engine.BLACKJACK)
+        assert blackjack[i] == (len(cards) == 2 and player.bjcount == engine.BLACKJACK)
+
+def test_empty_slots_pad_shorter_hands():
+    codes = hand_eval.encode_hands([['AH', 'KD'], ['5C']], width=4)
+    assert codes.shape == (2, 4)
+    totals, soft, bust, blackjack = hand_eval.evaluate_hands(codes)
+    assert totals.tolist() == [21, 5]
+    assert blackjack.tolist() == [True, False]
+
+def test_rejects_one_dimensional_input():
+    with pytest.raises(ValueError):
+        hand_eval.evaluate_hands([1, 10])
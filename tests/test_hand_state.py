@@ -0,0 +1,51 @@
+import random
+import pytest
+import gamedata as g
+import engine
+
+def hand(*cards):
+    state = g.HandState()
+    for card in cards:
+        state.add_card(card, engine.get_card_value(card))
+    return state
+
+@pytest.mark.parametrize('cards, total, soft', [
+    (('AH', '6C'), 17, True),
+    (('AH', 'AC'), 12, True),
+    (('AH', 'AC', 'TD'), 12, False),
+    (('AH', '6C', 'TD'), 17, False),
+    (('AH', 'AC', '9D'), 21, True),
+    (('AH', 'AC', 'AD', 'AS'), 14, True),
+    (('AH', 'AC', 'AD', 'AS', '7H'), 21, True),
+    (('AH', '5C', 'AD', 'TS'), 17, False),
+    (('9H', '7C', '5D'), 21, False),
+])
+def test_ace_counts(cards, total, soft):
+    state = hand(*cards)
+    assert (state.bjcount, state.softhand) == (total, soft)
+    assert state.aces == sum(card[0] == 'A' for card in cards)
+    assert state.hard == sum(1 if card[0] == 'A' else engine.get_card_value(card) for card in cards)
+    assert engine.hand_total(cards) == total
+
+def test_blackjack_needs_two_cards():
+    assert hand('AH', 'KC').blackjack
+    assert not hand('7H', '7C', '7D').blackjack
+
+def test_bust():
+    assert hand('TH', '6C', 'KD').bust
+    assert not hand('AH', '6C', 'KD').bust
+
+def test_score_is_the_ace_rule():
+    rng = random.Random(5)
+    for _ in range(2000):
+        cards = [rng.choice(g.CARD_NAMES) for _ in range(rng.randint(1, 8))]
+        state = hand(*cards)
+        assert g.HandState.score(state.hard, state.aces) == (state.bjcount, state.softhand)
+    assert g.HandState.score(11, 1) == (21, True)
+    assert g.HandState.score(12, 1) == (12, False)
+    assert g.HandState.score(16, 0) == (16, False)
+
+def test_players_are_slotted():
+    player = g.Player(name='Player', card_pos_x=0, card_pos_y=0)
+    with pytest.raises(AttributeError):
+        player.isplaying = True
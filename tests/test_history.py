@@ -0,0 +1,62 @@
+import pytest
+import gamedata as g
+import engine
+import history
+
+def play(shoe, count, hit_below):
+    # (seed, position, round) for `count` rounds from a seeded shoe
+    rounds = []
+    for i in range(count):
+        if shoe.needs_shuffle or shoe.seed is None:
+            shoe.shuffle(1000 + i)
+        start = (shoe.seed, shoe.position)
+        rounds.append(start + (engine.play_round(shoe, hit_below),))
+    return rounds
+
+def test_round_trip_replays_every_hand(tmp_path):
+    path = str(tmp_path / 'hands.bjh')
+    shoe = g.Shoe(2, 0.75, compact=True)
+    rounds = play(shoe, 300, hit_below=15)
+    with history.HandRecorder(path, 2, batch=64) as recorder:
+        for seed, position, game in rounds:
+            recorder.record_round(game, seed, position)
+
+    decks, records = history.read_history(path)
+    assert decks == 2
+    assert [record[:2] for record in records] == [(seed, position) for seed, position, game in rounds]
+    assert [record[3] for record in records] == [game.outcome for seed, position, game in rounds]
+    assert history.replay_all(decks, records) == []
+
+    replayer = history.Replayer(decks)
+    for record, (seed, position, game) in zip(records, rounds):
+        replayed = replayer.replay(record)
+        assert replayed.player.hand == game.player.hand
+        assert replayed.dealer.hand == game.dealer.hand
+
+def test_partial_last_record_is_ignored(tmp_path):
+    path = tmp_path / 'hands.bjh'
+    with history.HandRecorder(str(path), 1) as recorder:
+        recorder.record(1, 0, 0, 1)
+        recorder.record(2, 4, 1, -1)
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    assert history.read_history(str(path)) == (1, [(1, 0, 0, 1), (2, 4, 1, -1)])
+
+def test_recorder_refuses_another_shoe_size(tmp_path):
+    path = str(tmp_path / 'hands.bjh')
+    with history.HandRecorder(path, 6) as recorder:
+        recorder.record(1, 0, 0, 0)
+    with pytest.raises(ValueError):
+        history.HandRecorder(path, 2)
+
+def test_new_seeds_fit_a_record():
+    seed = history.new_seed()
+    assert 0 <= seed < 2 ** 64
+    history.RECORD.pack(seed, 0, 0, 0)
+
+def test_a_seed_source_repeats_the_seeds(monkeypatch):
+    import random
+    monkeypatch.setattr(history, 'seed_source', random.Random(4))
+    first = [history.new_seed() for _ in range(3)]
+    monkeypatch.setattr(history, 'seed_source', random.Random(4))
+    assert [history.new_seed() for _ in range(3)] == first
@@ -0,0 +1,81 @@
+import json
+import asyncio
+import server
+
+def test_a_table_plays_a_round():
+    table = server.Table(6, 0.75)
+    state = table.handle('deal')
+    assert len(state['player']) == 2
+    assert state['dealer'][0] is None or state['game_over']
+    while not state['game_over']:
+        state = table.handle('stand')
+    assert state['outcome'] in (1, 0, -1)
+    assert state['dealer'][0] is not None and state['dealer_total'] is not None
+
+def test_a_table_refuses_actions_out_of_turn():
+    table = server.Table(6, 0.75)
+    assert 'error' in table.handle('hit')
+    assert 'error' in table.handle('stand')
+    assert 'error' in table.handle('split')
+
+def test_finished_rounds_are_recorded():
+    class Recorder:
+        def __init__(self):
+            self.rounds = []
+
+        def record_round(self, game_round, seed, position):
+            self.rounds.append((game_round.outcome, seed, position))
+
+    recorder = Recorder()
+    table = server.Table(6, 0.75, recorder)
+    for _ in range(5):
+        state = table.handle('deal')
+        while not state['game_over']:
+            state = table.handle('stand')
+    assert len(recorder.rounds) == 5
+    assert recorder.rounds[0][1] == table.shoe.seed and recorder.rounds[0][2] == 0
+
+def test_line_json_over_a_socket():
+    async def play():
+        table_server = server.TableServer()
+        listener = await asyncio.start_server(table_server.serve_table, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+        async def ask(line):
+            writer.write(line)
+            await writer.drain()
+            return json.loads(await reader.readline())
+
+        replies = [await ask(server.encode_message({'action': 'deal', 'id': 7})),
+                   await ask(b'not json\n'),
+                   await ask(server.encode_message({'action': 'stand'}))]
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return table_server, replies
+
+    table_server, (dealt, garbage, stood) = asyncio.run(play())
+    assert dealt['id'] == 7 and len(dealt['player']) == 2
+    assert 'error' in garbage
+    assert 'error' in stood or stood['game_over']  # A natural ends the round at the deal
+    assert table_server.requests == 3
+
+def test_deal_gives_up_a_round_in_play():
+    class Recorder:
+        def __init__(self):
+            self.rounds = 0
+
+        def record_round(self, game_round, seed, position):
+            self.rounds += 1
+
+    recorder = Recorder()
+    table = server.Table(6, 0.75, recorder)
+    state = table.handle('deal')
+    while state['game_over']:  # Naturals end a round at the deal
+        state = table.handle('deal')
+    recorded = recorder.rounds
+    state = table.handle('deal')
+    assert 'error' not in state and len(state['player']) == 2
+    # The unfinished round is not recorded; the new one is if it ended in a natural
+    assert recorder.rounds == recorded + state['game_over']
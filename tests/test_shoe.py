@@ -0,0 +1,127 @@
+import pytest
+import gamedata as g
+import engine
+
+def deal_all(shoe):
+    return [shoe.deal_card() for _ in range(len(shoe))]
+
+def test_a_shoe_deals_every_card_of_every_deck_once():
+    shoe = g.Shoe(2, compact=True)
+    assert len(shoe) == 2 * len(g.CARD_NAMES)
+    assert sorted(deal_all(shoe)) == sorted(list(range(len(g.CARD_NAMES))) * 2)
+    assert len(shoe) == 0 and list(shoe.deck) == []
+
+def test_shuffling_returns_every_card():
+    shoe = g.Shoe(1)
+    for _ in range(10):
+        shoe.deal_card()
+    assert len(shoe) == 42 and len(shoe.deck) == 42
+    shoe.shuffle()
+    assert len(shoe) == 52
+    assert sorted(deal_all(shoe)) == sorted(g.CARD_NAMES)
+
+def test_cut_card():
+    shoe = g.Shoe(1, penetration=0.5)
+    assert shoe.cut_card == 26
+    for _ in range(25):
+        shoe.deal_card()
+    assert not shoe.needs_shuffle
+    shoe.deal_card()
+    assert shoe.needs_shuffle
+    shoe.shuffle()
+    assert not shoe.needs_shuffle
+
+@pytest.mark.parametrize('decks, penetration', [(0, 0.75), (6, 1.0), (6, -0.1)])
+def test_rejects_bad_shoes(decks, penetration):
+    with pytest.raises(ValueError):
+        g.Shoe(decks, penetration)
+
+def test_rounds_deal_from_the_shoe():
+    shoe = g.Shoe(6)
+    dealt = 0
+    while not shoe.needs_shuffle:
+        engine.play_hand(shoe)
+        assert len(shoe) == 6 * 52 - shoe.position
+        dealt += 1
+    assert dealt > 10
+
+def test_a_seed_deals_the_same_cards_again():
+    shoe = g.Shoe(2)
+    shoe.shuffle(42)
+    first = [shoe.deal_card() for _ in range(30)]
+    shoe.shuffle(7)
+    shoe.deal_card()
+    shoe.shuffle(42)
+    assert [shoe.deal_card() for _ in range(30)] == first
+    assert shoe.seed == 42
+
+def test_shoes_with_equal_generators_deal_alike():
+    import random
+    first = g.Shoe(2, rng=random.Random(5))
+    second = g.Shoe(2, rng=random.Random(5))
+    assert deal_all(first) == deal_all(second)
+
+def test_a_deck_shuffles_with_its_generator():
+    import random
+    decks = []
+    for _ in range(2):
+        deck = g.Deck(rng=random.Random(9))
+        deck.generate_deck()
+        deck.shuffle()
+        decks.append(deck.deck)
+    assert decks[0] == decks[1] and sorted(decks[0]) == sorted(g.CARD_NAMES)
+
+def test_precomputed_shuffles_deal_every_card():
+    np = pytest.importorskip('numpy')
+    import shuffles
+    cards = 2 * len(g.CARD_NAMES)
+    lists = shuffles.batched_shuffles(shuffles.stream(11, 0), cards, batch=4)
+    shoe = g.Shoe(2, compact=True, shuffles=lists)
+    for _ in range(6):  # Runs past the first batch
+        assert sorted(deal_all(shoe)) == sorted(list(range(len(g.CARD_NAMES))) * 2)
+        shoe.shuffle()
+
+def test_swap_indices_stay_in_range():
+    np = pytest.importorskip('numpy')
+    import shuffles
+    swaps = shuffles.swap_indices(shuffles.stream(3, 1), 50, 104)
+    assert swaps.shape == (50, 104)
+    assert (swaps >= np.arange(104)).all() and (swaps < 104).all()
+
+def test_streams_are_repeatable_and_distinct():
+    pytest.importorskip('numpy')
+    import shuffles
+    assert shuffles.stream(1, 2).integers(1 << 62) == shuffles.stream(1, 2).integers(1 << 62)
+    assert shuffles.stream(1, 2).integers(1 << 62) != shuffles.stream(1, 3).integers(1 << 62)
+
+def test_a_shoe_keeps_its_reserve_past_the_cut_card():
+    g.Shoe(1, 0.75, reserve=engine.round_reserve())
+    with pytest.raises(ValueError):
+        g.Shoe(1, 0.9, reserve=engine.round_reserve())
+
+def test_a_dry_shoe_refills_and_then_needs_a_shuffle():
+    shoe = g.Shoe(1, 0.5)
+    shoe.shuffle(3)
+    first = deal_all(shoe)
+    assert not shoe.refilled
+    card = shoe.deal_card()  # Past the last card
+    assert shoe.refilled and shoe.needs_shuffle and len(shoe) == 51
+    shoe.shuffle(3)
+    assert not shoe.refilled and shoe.deal_card() == first[0]
+    assert card in g.CARD_NAMES
+
+def test_rounds_always_finish():
+    shoe = g.Shoe(1, 0.95, compact=True)  # No reserve, so some rounds run it dry
+    for _ in range(500):
+        if shoe.needs_shuffle:
+            shoe.shuffle()
+        assert engine.play_hand(shoe) in (1, 0, -1)
+
+def test_a_numpy_generator_deals_the_shoe():
+    np = pytest.importorskip('numpy')
+    shoe = g.Shoe(2, compact=True, rng=np.random.default_rng(8))
+    assert sorted(deal_all(shoe)) == sorted(list(range(len(g.CARD_NAMES))) * 2)
+    first, second = (g.Shoe(2, compact=True, rng=np.random.default_rng(8)) for _ in range(2))
+    assert deal_all(first) == deal_all(second)
+    with pytest.raises(TypeError):
+        g.Shoe(2, rng=object())
@@ -0,0 +1,74 @@
+import pytest
+import gamedata as g
+import engine
+import dealer_odds as d
+import solver
+
+def shoe_without(decks, *classes):
+    counts = list(d.full_composition(decks))
+    for i in classes:
+        counts[i] -= 1
+    return counts
+
+def test_table_evicts_least_recently_used():
+    table = solver.TranspositionTable(max_bytes=1)
+    table.put('a', (1.0, 2.0))
+    table.put('b', (3.0, 4.0))
+    assert table.get('a') is None and table.get('b') == (3.0, 4.0)
+    assert table.stats()['evictions'] == 1 and table.stats()['entries'] == 1
+
+    table = solver.TranspositionTable()
+    table.put('a', 1)
+    table.put('b', 2)
+    table.get('a')
+    table.max_bytes = table.bytes  # Room for two entries
+    table.put('c', 3)
+    assert list(table.entries) == ['a', 'c']
+
+def test_table_bytes_measure_keys_and_values():
+    s = solver.Solver()
+    s.solve(13, 0, '7', shoe_without(2, 9, 2, 5))
+    table = s.table
+    assert table.bytes == sum(solver.entry_size(key, value) for key, value in table.entries.items())
+    assert any(key[0] == 'dealer' for key in table.entries)  # Dealer distributions share the budget
+
+def test_stand_ev_follows_the_dealer_distribution():
+    counts = shoe_without(6, 9, 6, 5)  # Player T,7 against a 6
+    dist = d.dealer_distribution('6', counts, peeked=True)
+    stand, hit = solver.Solver().solve(17, 0, '6', counts)
+    assert stand == pytest.approx(dist[d.BUST] - sum(dist[1:d.BUST]))
+
+def test_hitting_a_hard_twenty_one_always_busts():
+    counts = shoe_without(6, 9, 0, 9)
+    stand, hit = solver.Solver().solve(21, 0, 'T', counts)
+    assert hit == pytest.approx(-1.0) and stand > 0.8
+
+def test_basic_strategy_decisions():
+    s = solver.Solver()
+    assert s.best_action(5, 0, 'T', shoe_without(6, 1, 2, 9))[0] == 'hit'
+    assert s.best_action(20, 0, '6', shoe_without(6, 9, 9, 5))[0] == 'stand'
+    assert s.best_action(16, 0, 'T', shoe_without(6, 9, 5, 9))[0] == 'hit'
+    assert s.best_action(13, 0, '6', shoe_without(6, 9, 2, 5))[0] == 'stand'
+
+def test_a_small_table_gives_the_same_answer():
+    counts = shoe_without(1, 1, 2, 0)
+    full = solver.Solver().solve(5, 0, 'A', counts)
+    small = solver.Solver(max_bytes=20000)
+    assert small.solve(5, 0, 'A', counts) == pytest.approx(full)
+    assert small.table.stats()['evictions'] > 0
+    assert small.table.bytes <= 20000
+
+def test_solve_round_answers_for_a_live_round():
+    shoe = g.Shoe(1)
+    s = solver.Solver()
+    for _ in range(10):
+        if shoe.needs_shuffle:
+            shoe.shuffle()
+        game = engine.Round(shoe)
+        game.deal()
+        answer = solver.solve_round(s, game)
+        if game.game_over:
+            assert answer is None
+        else:
+            action, ev = answer
+            assert action in ('hit', 'stand') and -1.0 <= ev <= 1.0
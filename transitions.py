@@ -0,0 +1,26 @@
+import time
+
+# --------------------------- Crossfade --------------------------- #
+class Crossfade:
+    """
+    Fades from a snapshot of the outgoing scene to whatever is drawn underneath.
+    The outgoing scene is captured once; each frame the new scene is drawn as
+    usual and the snapshot is blitted over it with decreasing alpha.
+    """
+    def __init__(self, snapshot, duration=0.4, clock=time.perf_counter):
+        self.snapshot = snapshot
+        self.duration = duration
+        self.clock = clock
+        self.start_time = clock()
+
+    def progress(self):
+        if self.duration <= 0:
+            return 1.0
+        return min((self.clock() - self.start_time) / self.duration, 1.0)
+
+    def done(self):
+        return self.progress() >= 1.0
+
+    def draw(self, surface):
+        self.snapshot.set_alpha(int(255 * (1.0 - self.progress())))
+        surface.blit(self.snapshot, (0, 0))